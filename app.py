@@ -6,9 +6,13 @@ Brand-aligned version with grid-based layouts
 import streamlit as st
 import sqlite3
 import hashlib
-from datetime import datetime
-import json
-import os
+import hmac
+import secrets
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain
 
 # ============================================================================
 # CALYX BRAND CONFIGURATION
@@ -34,27 +38,26 @@ CALYX_COLORS = {
 # CALYX BRAND STYLES
 # ============================================================================
 
-def get_calyx_styles():
-    return f"""
+_CALYX_CSS_TEMPLATE = """
     <style>
         /* Import clean geometric font similar to Kentos R1 */
         @import url('https://fonts.googleapis.com/css2?family=DM+Sans:opsz,wght@9..40,300;9..40,400;9..40,500;9..40,600;9..40,700&display=swap');
         
         /* Root Variables - Calyx Brand Colors */
         :root {{
-            --calyx-primary: {CALYX_COLORS['primary']};
-            --calyx-primary-light: {CALYX_COLORS['primary_light']};
-            --calyx-white: {CALYX_COLORS['white']};
-            --calyx-black: {CALYX_COLORS['black']};
-            --calyx-cloud-blue: {CALYX_COLORS['cloud_blue']};
-            --calyx-powder-blue: {CALYX_COLORS['powder_blue']};
-            --calyx-mist-blue: {CALYX_COLORS['mist_blue']};
-            --calyx-ocean-blue: {CALYX_COLORS['ocean_blue']};
-            --calyx-gray-90: {CALYX_COLORS['gray_90']};
-            --calyx-gray-60: {CALYX_COLORS['gray_60']};
-            --calyx-gray-30: {CALYX_COLORS['gray_30']};
-            --calyx-gray-10: {CALYX_COLORS['gray_10']};
-            --calyx-gray-5: {CALYX_COLORS['gray_5']};
+            --calyx-primary: {primary};
+            --calyx-primary-light: {primary_light};
+            --calyx-white: {white};
+            --calyx-black: {black};
+            --calyx-cloud-blue: {cloud_blue};
+            --calyx-powder-blue: {powder_blue};
+            --calyx-mist-blue: {mist_blue};
+            --calyx-ocean-blue: {ocean_blue};
+            --calyx-gray-90: {gray_90};
+            --calyx-gray-60: {gray_60};
+            --calyx-gray-30: {gray_30};
+            --calyx-gray-10: {gray_10};
+            --calyx-gray-5: {gray_5};
         }}
         
         /* Global Typography */
@@ -398,10 +401,6 @@ def get_calyx_styles():
             color: var(--calyx-primary);
         }}
         
-        /* Hide default streamlit branding */
-        #MainMenu {{visibility: hidden;}}
-        footer {{visibility: hidden;}}
-        
         /* Custom scrollbar */
         ::-webkit-scrollbar {{
             width: 8px;
@@ -422,176 +421,477 @@ def get_calyx_styles():
     </style>
     """
 
+# Brand colors never change at runtime, so build the stylesheet once at import
+CALYX_CSS = _CALYX_CSS_TEMPLATE.format(**CALYX_COLORS)
+
 # ============================================================================
 # DATABASE SETUP
 # ============================================================================
 
 DB_PATH = "scar_system.db"
+# Bump whenever init_db() changes so existing databases pick up the new DDL
+DB_SCHEMA_VERSION = 4
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+def _connect():
+    """Open the app database with the shared connection PRAGMAs"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
+@st.cache_resource
+def get_db():
+    """Process-wide autocommit connection for reads; under WAL it only sees committed rows"""
+    return _connect()
+
+@st.cache_resource
+def _get_writer():
+    """Process-wide connection reserved for write_transaction()"""
+    return _connect()
+
+# Writes have their own connection so other sessions' reads never run inside
+# an open transaction; writers still take turns on it
+_write_lock = threading.Lock()
+
+@contextmanager
+def write_transaction():
+    """Run the block's writes as one BEGIN IMMEDIATE ... COMMIT on the writer connection"""
+    conn = _get_writer()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            # Also covers a failed COMMIT (e.g. SQLITE_BUSY), which leaves the transaction open
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+SQL_LOG_ACTIVITY = '''
+    INSERT INTO activity_log (scar_id, user_id, action, details)
+    VALUES (?, ?, ?, ?)
+'''
+
+def log_activity(conn, scar_id, user_id, action, details):
+    """Record a SCAR activity row; call inside the write_transaction() of the change itself"""
+    conn.execute(SQL_LOG_ACTIVITY, (scar_id, user_id, action, details))
+
+def log_activities(conn, rows):
+    """Record several (scar_id, user_id, action, details) activity rows in one call"""
+    conn.executemany(SQL_LOG_ACTIVITY, rows)
+
+# Columns the detail tabs may write; guards the column names spliced into UPDATE
+SCAR_EDITABLE_COLUMNS = frozenset((
+    'product_name', 'part_number', 'lot_number', 'quantity_affected', 'priority', 'status',
+    'nc_description', 'nc_category', 'detection_method',
+    'containment_actions', 'containment_date', 'containment_responsible',
+    'root_cause', 'rca_method', 'rca_completed_date',
+    'corrective_action', 'ca_responsible', 'ca_target_date', 'ca_completion_date',
+    'preventive_action', 'pa_responsible', 'pa_target_date',
+    'verification_method', 'verification_result', 'verification_date', 'verified_by',
+))
+
+def scar_changes(orig, values):
+    """Form values that differ from the pre-edit SCAR snapshot (dates as ISO strings, '' == NULL)"""
+    changes = {}
+    for column, value in values.items():
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        if (value or None) != (orig[column] or None):
+            changes[column] = value
+    return changes
+
+def update_scar_fields(conn, scar_id, changes):
+    """UPDATE only the changed SCAR columns; call inside write_transaction()"""
+    unknown = changes.keys() - SCAR_EDITABLE_COLUMNS
+    if unknown:
+        raise ValueError(f"Not an editable SCAR column: {', '.join(sorted(unknown))}")
+    conn.execute(
+        f"UPDATE scars SET {', '.join(f'{k}=?' for k in changes)} WHERE id=?",
+        (*changes.values(), scar_id),
+    )
+
+SQL_SCAR_BY_NUMBER = '''
+    SELECT s.*, v.name as vendor_name, v.code as vendor_code
+    FROM scars s
+    LEFT JOIN vendors v ON s.vendor_id = v.id
+    WHERE s.scar_number = ?
+'''
+
 def init_db():
     conn = get_db()
     c = conn.cursor()
+    # Databases stamped with the current version have nothing left to create
+    if c.execute("PRAGMA user_version").fetchone()[0] >= DB_SCHEMA_VERSION:
+        return
     
-    # Users table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL DEFAULT 'supplier',
-            vendor_id INTEGER,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (vendor_id) REFERENCES vendors(id)
-        )
-    ''')
+    # Schema and seed data go in as one transaction; a failure rolls it all back
+    with write_transaction() as conn:
+        c = conn.cursor()
     
-    # Vendors table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS vendors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            code TEXT UNIQUE NOT NULL,
-            contact_name TEXT,
-            contact_email TEXT,
-            contact_phone TEXT,
-            address TEXT,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+        # Users table
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                role TEXT NOT NULL DEFAULT 'supplier',
+                vendor_id INTEGER,
+                status TEXT DEFAULT 'pending',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (vendor_id) REFERENCES vendors(id)
+            )
+        ''')
     
-    # SCARs table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS scars (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            scar_number TEXT UNIQUE NOT NULL,
-            vendor_id INTEGER NOT NULL,
-            status TEXT DEFAULT 'Open',
-            priority TEXT DEFAULT 'Medium',
-            created_by INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            due_date DATE,
+        # Vendors table
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS vendors (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                code TEXT UNIQUE NOT NULL,
+                contact_name TEXT,
+                contact_email TEXT,
+                contact_phone TEXT,
+                address TEXT,
+                status TEXT DEFAULT 'active',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    
+        # SCARs table
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS scars (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scar_number TEXT UNIQUE NOT NULL,
+                vendor_id INTEGER NOT NULL,
+                status TEXT DEFAULT 'Open',
+                priority TEXT DEFAULT 'Medium',
+                created_by INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                due_date DATE,
             
-            -- Section 1: SCAR Details
-            product_name TEXT,
-            part_number TEXT,
-            lot_number TEXT,
-            quantity_affected INTEGER,
+                -- Section 1: SCAR Details
+                product_name TEXT,
+                part_number TEXT,
+                lot_number TEXT,
+                quantity_affected INTEGER,
             
-            -- Section 2: Non-Conformity Description
-            nc_description TEXT,
-            nc_category TEXT,
-            detection_method TEXT,
+                -- Section 2: Non-Conformity Description
+                nc_description TEXT,
+                nc_category TEXT,
+                detection_method TEXT,
             
-            -- Section 3: Containment Actions
-            containment_actions TEXT,
-            containment_date DATE,
-            containment_responsible TEXT,
+                -- Section 3: Containment Actions
+                containment_actions TEXT,
+                containment_date DATE,
+                containment_responsible TEXT,
             
-            -- Section 4: Root Cause Analysis
-            root_cause TEXT,
-            rca_method TEXT,
-            rca_completed_date DATE,
+                -- Section 4: Root Cause Analysis
+                root_cause TEXT,
+                rca_method TEXT,
+                rca_completed_date DATE,
             
-            -- Section 5: Corrective Action
-            corrective_action TEXT,
-            ca_responsible TEXT,
-            ca_target_date DATE,
-            ca_completion_date DATE,
+                -- Section 5: Corrective Action
+                corrective_action TEXT,
+                ca_responsible TEXT,
+                ca_target_date DATE,
+                ca_completion_date DATE,
             
-            -- Section 6: Preventive Action
-            preventive_action TEXT,
-            pa_responsible TEXT,
-            pa_target_date DATE,
+                -- Section 6: Preventive Action
+                preventive_action TEXT,
+                pa_responsible TEXT,
+                pa_target_date DATE,
             
-            -- Section 7: Verification
-            verification_method TEXT,
-            verification_result TEXT,
-            verification_date DATE,
-            verified_by TEXT,
+                -- Section 7: Verification
+                verification_method TEXT,
+                verification_result TEXT,
+                verification_date DATE,
+                verified_by TEXT,
             
-            closed_at TIMESTAMP,
-            FOREIGN KEY (vendor_id) REFERENCES vendors(id),
-            FOREIGN KEY (created_by) REFERENCES users(id)
-        )
-    ''')
-    
-    # Activity log table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS activity_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            scar_id INTEGER,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            details TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (scar_id) REFERENCES scars(id),
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    ''')
-    
-    conn.commit()
+                closed_at TIMESTAMP,
+                FOREIGN KEY (vendor_id) REFERENCES vendors(id),
+                FOREIGN KEY (created_by) REFERENCES users(id)
+            )
+        ''')
     
-    # Create default admin if not exists
-    admin_hash = hashlib.sha256("admin123".encode()).hexdigest()
-    try:
+        # Activity log table
         c.execute('''
-            INSERT OR IGNORE INTO users (username, password_hash, role, status)
-            VALUES (?, ?, ?, ?)
-        ''', ("admin", admin_hash, "admin", "approved"))
-        conn.commit()
-    except:
-        pass
-    
-    # Create demo vendor if not exists
-    try:
+            CREATE TABLE IF NOT EXISTS activity_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scar_id INTEGER,
+                user_id INTEGER,
+                action TEXT NOT NULL,
+                details TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (scar_id) REFERENCES scars(id),
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        ''')
+    
+        # Indexes for the dashboard counts, recent-SCARs listing and SCAR filters
+        # (users.username is UNIQUE and already indexed). The filter indexes lead
+        # with the old (status) and (vendor_id, status) keys, which they replace.
+        # created_at is ascending so "created_at DESC, id DESC" walks these
+        # backwards along the trailing rowid with no temp B-tree sort; the
+        # created_at DESC versions from earlier schemas are rebuilt
+        for name in ("idx_scars_status", "idx_scars_vendor_status", "idx_scars_filter",
+                     "idx_scars_status_created", "idx_scars_created", "idx_scars_vendor_created"):
+            c.execute(f"DROP INDEX IF EXISTS {name}")
+        c.execute("CREATE INDEX idx_scars_filter ON scars(vendor_id, status, priority, created_at)")
+        c.execute("CREATE INDEX idx_scars_status_created ON scars(status, created_at)")
+        c.execute("CREATE INDEX idx_scars_created ON scars(created_at)")
+        c.execute("CREATE INDEX idx_scars_vendor_created ON scars(vendor_id, created_at)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_vendors_status ON vendors(status)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)")
+    
+        # Seed demo accounts; the supplier is linked to the demo vendor by code
         c.execute('''
             INSERT OR IGNORE INTO vendors (name, code, contact_name, contact_email, status)
             VALUES (?, ?, ?, ?, ?)
         ''', ("Demo Supplier Inc.", "DEMO-001", "John Smith", "john@demosupplier.com", "active"))
-        conn.commit()
-        
-        # Create demo supplier user
-        supplier_hash = hashlib.sha256("supplier123".encode()).hexdigest()
-        c.execute("SELECT id FROM vendors WHERE code = 'DEMO-001'")
-        vendor = c.fetchone()
-        if vendor:
-            c.execute('''
-                INSERT OR IGNORE INTO users (username, password_hash, role, vendor_id, status)
-                VALUES (?, ?, ?, ?, ?)
-            ''', ("supplier", supplier_hash, "supplier", vendor['id'], "approved"))
-            conn.commit()
-    except:
-        pass
-    
-    conn.close()
+        c.executemany('''
+            INSERT OR IGNORE INTO users (username, password_hash, role, vendor_id, status)
+            VALUES (?, ?, ?, (SELECT id FROM vendors WHERE code = ?), ?)
+        ''', [
+            ("admin", hash_password("admin123"), "admin", None, "approved"),
+            ("supplier", hash_password("supplier123"), "supplier", "DEMO-001", "approved"),
+        ])
+    
+        c.execute(f"PRAGMA user_version = {DB_SCHEMA_VERSION}")
+
+@st.cache_resource
+def _ensure_db():
+    """Run schema setup and seeding once per server process"""
+    init_db()
+    return True
 
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Salted BLAKE2b hash stored as 'blake2b$<salt hex>$<digest hex>'"""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.blake2b(password.encode(), salt=salt, digest_size=32).hexdigest()
+    return f"blake2b${salt.hex()}${digest}"
+
+def verify_password(password, stored_hash):
+    """Check a password against a salted BLAKE2b hash or a legacy unsalted SHA-256 one"""
+    try:
+        if stored_hash.startswith("blake2b$"):
+            _, salt_hex, expected = stored_hash.split("$")
+            candidate = hashlib.blake2b(password.encode(), salt=bytes.fromhex(salt_hex), digest_size=32).hexdigest()
+        else:
+            expected = stored_hash
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(candidate, expected)
+    except (ValueError, TypeError):
+        # Malformed stored hash (bad field count, hex or salt length, non-ASCII)
+        return False
 
 # ============================================================================
-# AUTHENTICATION
+# CACHED LOOKUPS
 # ============================================================================
 
-def authenticate(username, password):
+@st.cache_data(ttl=300)
+def _cached_vendors():
+    """Active vendors for dropdowns, shared across reruns and sessions"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute("SELECT id, name, code FROM vendors WHERE status = 'active' ORDER BY name")
+    vendors = [dict(v) for v in c.fetchall()]
+    return vendors
+
+@st.cache_data(ttl=300)
+def _vendor_options():
+    """Vendor selectbox labels (as an immutable tuple) and their label -> id map"""
+    ids_by_label = {f"{v['code']} - {v['name']}": v['id'] for v in _cached_vendors()}
+    return tuple(ids_by_label), ids_by_label
+
+# Rows per page of the SCAR grid
+SCAR_PAGE_SIZE = 50
+
+def _scar_filters(role, vendor_id, status, priority):
+    """WHERE clause and params for the role's SCAR scope and the page filters ("All" = no filter)"""
+    where = " WHERE 1=1"
+    params = []
+    
+    if role != 'admin':
+        where += " AND s.vendor_id = ?"
+        params.append(vendor_id)
+    
+    if status != "All":
+        where += " AND s.status = ?"
+        params.append(status)
+    
+    if priority != "All":
+        where += " AND s.priority = ?"
+        params.append(priority)
+    
+    return where, params
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_scars(role, vendor_id, status, priority, after=None):
+    """One page of SCAR list rows, newest first, as (scar_number, vendor_code,
+    vendor_name, product_name, status, priority, due_date, created_at, id)
+    tuples. `after` is the (created_at, id) keyset of the previous page's last
+    row; one extra row is fetched so the caller can tell whether a next page exists"""
+    where, params = _scar_filters(role, vendor_id, status, priority)
+    if after is not None:
+        where += " AND (s.created_at, s.id) < (?, ?)"
+        params.extend(after)
+    
+    query = '''
+        SELECT s.scar_number, v.code, v.name, s.product_name, s.status, s.priority, s.due_date,
+               s.created_at, s.id
+        FROM scars s
+        LEFT JOIN vendors v ON s.vendor_id = v.id
+    ''' + where + " ORDER BY s.created_at DESC, s.id DESC LIMIT ?"
+    params.append(SCAR_PAGE_SIZE + 1)
+    
+    conn = get_db()
+    c = conn.cursor()
+    c.row_factory = None
+    c.execute(query, params)
+    return c.fetchall()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _count_scars(role, vendor_id, status, priority):
+    """Number of SCARs matching the list filters"""
+    where, params = _scar_filters(role, vendor_id, status, priority)
+    conn = get_db()
+    c = conn.cursor()
+    c.row_factory = None
+    c.execute("SELECT COUNT(*) FROM scars s" + where, params)
+    return c.fetchone()[0]
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_scar(scar_number):
+    """One SCAR with its vendor name/code for the detail view, or None"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(SQL_SCAR_BY_NUMBER, (scar_number,))
+    row = c.fetchone()
+    return dict(row) if row else None
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _fetch_scar_page(scar_numbers):
+    """Detail rows for every SCAR on the current grid page, keyed by SCAR number, in one query"""
+    if not scar_numbers:
+        return {}
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT s.*, v.name as vendor_name, v.code as vendor_code
+        FROM scars s
+        LEFT JOIN vendors v ON s.vendor_id = v.id
+        WHERE s.scar_number IN ({','.join('?' * len(scar_numbers))})
+    ''', scar_numbers)
+    return {row['scar_number']: dict(row) for row in c.fetchall()}
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_vendors():
+    """Vendor list rows with their SCAR counts"""
     conn = get_db()
     c = conn.cursor()
-    password_hash = hash_password(password)
     c.execute('''
-        SELECT u.*, v.name as vendor_name, v.code as vendor_code
+        SELECT v.*, COALESCE(sc.n, 0) as scar_count
+        FROM vendors v
+        LEFT JOIN (SELECT vendor_id, COUNT(*) AS n FROM scars GROUP BY vendor_id) sc
+            ON sc.vendor_id = v.id
+        ORDER BY v.name
+    ''')
+    return [dict(row) for row in c.fetchall()]
+
+def clear_vendor_cache():
+    """Invalidate cached vendor lookups after a vendor is added or edited"""
+    _cached_vendors.clear()
+    _vendor_options.clear()
+    _sidebar_snapshot.clear()
+    _fetch_vendors.clear()
+    # SCAR rows show the vendor name
+    _fetch_scars.clear()
+    _fetch_scar.clear()
+    _fetch_scar_page.clear()
+    _recent_scars_html.clear()
+
+def clear_scar_cache():
+    """Invalidate cached SCAR lists and renders after a SCAR is created or edited"""
+    _fetch_scars.clear()
+    _count_scars.clear()
+    _fetch_scar.clear()
+    _fetch_scar_page.clear()
+    _recent_scars_html.clear()
+    # Vendor rows carry SCAR counts
+    _fetch_vendors.clear()
+
+def stage_scar_changes(scar_id, summary, changes):
+    """Hold one tab's edits in the session until Save Changes writes them"""
+    pending = st.session_state.setdefault('_pending_updates', {}).setdefault(scar_id, {})
+    if changes:
+        pending[summary] = changes
+        st.info("Staged; use Save Changes below the tabs to write it.")
+    else:
+        pending.pop(summary, None)
+        st.info("No changes to save")
+
+@st.cache_data(ttl=30)
+def _cached_pending_count():
+    """Number of users awaiting approval; refreshed at most every 30s"""
+    conn = get_db()
+    c = conn.cursor()
+    c.row_factory = None
+    c.execute("SELECT COUNT(*) FROM users WHERE status = 'pending'")
+    count = c.fetchone()[0]
+    return count
+
+@st.cache_data(ttl=15)
+def _sidebar_snapshot(user_id):
+    """Everything the sidebar reads from the database, in one round-trip"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('''
+        SELECT v.name as vendor_name,
+               (SELECT COUNT(*) FROM users WHERE status = 'pending') as pending
         FROM users u
         LEFT JOIN vendors v ON u.vendor_id = v.id
-        WHERE u.username = ? AND u.password_hash = ?
-    ''', (username, password_hash))
+        WHERE u.id = ?
+    ''', (user_id,))
+    row = c.fetchone()
+    return dict(row) if row else {'vendor_name': None, 'pending': 0}
+
+def clear_user_cache():
+    """Invalidate cached user lookups after users are created, changed or removed"""
+    _cached_pending_count.clear()
+    _sidebar_snapshot.clear()
+
+# ============================================================================
+# AUTHENTICATION
+# ============================================================================
+
+# The only user columns the app reads from the session; the hash stays out
+SESSION_USER_FIELDS = ('id', 'username', 'role', 'vendor_id', 'status', 'vendor_name')
+
+SQL_USER_BY_USERNAME = '''
+    SELECT u.*, v.name as vendor_name, v.code as vendor_code
+    FROM users u
+    LEFT JOIN vendors v ON u.vendor_id = v.id
+    WHERE u.username = ?
+'''
+
+def authenticate(username, password):
+    """Look up a user by credentials, upgrading a legacy SHA-256 hash on success"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute(SQL_USER_BY_USERNAME, (username,))
     user = c.fetchone()
-    conn.close()
-    return user
+    if not user or not verify_password(password, user['password_hash']):
+        return None
+    if not user['password_hash'].startswith("blake2b$"):
+        with write_transaction() as conn:
+            conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), user['id']))
+    return {k: user[k] for k in SESSION_USER_FIELDS}
 
 def check_login():
     if 'user' not in st.session_state or st.session_state.user is None:
@@ -621,47 +921,68 @@ def render_logo_text():
 # GRID TABLE COMPONENT
 # ============================================================================
 
-def render_grid_table(headers, rows, row_key=None):
-    """Render a clean grid-based table following Calyx brand guidelines"""
-    html = '<table class="calyx-grid"><thead><tr>'
-    for header in headers:
-        html += f'<th>{header}</th>'
-    html += '</tr></thead><tbody>'
+def render_grid_table(headers, rows):
+    """Render a clean grid-based table following Calyx brand guidelines; rows may be any iterable"""
+    parts = ['<table class="calyx-grid"><thead><tr>']
+    parts.extend(f'<th>{header}</th>' for header in headers)
+    parts.append('</tr></thead><tbody>')
     
     for row in rows:
-        html += '<tr>'
-        for cell in row:
-            html += f'<td>{cell}</td>'
-        html += '</tr>'
+        parts.append('<tr>')
+        parts.extend(f'<td>{cell}</td>' for cell in row)
+        parts.append('</tr>')
     
-    html += '</tbody></table>'
-    return html
+    parts.append('</tbody></table>')
+    return ''.join(parts)
+
+# Badge class by lowercased status; anything else gets the plain badge
+STATUS_BADGE_CLASSES = {
+    'open': 'status-badge status-open',
+    'pending': 'status-badge status-pending',
+    'in progress': 'status-badge status-pending',
+    'closed': 'status-badge status-closed',
+    'completed': 'status-badge status-closed',
+    'approved': 'status-badge status-approved',
+}
 
+@lru_cache(maxsize=32)
 def get_status_badge(status):
     """Generate status badge HTML"""
-    status_lower = status.lower()
-    if status_lower == 'open':
-        return f'<span class="status-badge status-open">{status}</span>'
-    elif status_lower in ['pending', 'in progress']:
-        return f'<span class="status-badge status-pending">{status}</span>'
-    elif status_lower in ['closed', 'completed']:
-        return f'<span class="status-badge status-closed">{status}</span>'
-    elif status_lower == 'approved':
-        return f'<span class="status-badge status-approved">{status}</span>'
-    else:
-        return f'<span class="status-badge">{status}</span>'
+    css_class = STATUS_BADGE_CLASSES.get(status.lower(), 'status-badge')
+    return f'<span class="{css_class}">{status}</span>'
 
+@lru_cache(maxsize=32)
 def get_role_badge(role):
     """Generate role badge HTML"""
-    if role == 'admin':
-        return f'<span class="status-badge role-admin">{role.upper()}</span>'
-    else:
-        return f'<span class="status-badge role-supplier">{role.upper()}</span>'
+    css_class = 'role-admin' if role == 'admin' else 'role-supplier'
+    return f'<span class="status-badge {css_class}">{role.upper()}</span>'
+
+# Badge markup for the values the forms can store, rendered once at import
+STATUS_BADGES = {s: get_status_badge(s) for s in ("Open", "In Progress", "Closed", "approved", "pending")}
+ROLE_BADGES = {r: get_role_badge(r) for r in ("admin", "supplier")}
+VENDOR_STATUS_BADGES = {
+    'active': '<span class="status-badge status-closed">ACTIVE</span>',
+    'inactive': '<span class="status-badge status-pending">INACTIVE</span>',
+}
 
 # ============================================================================
 # SIDEBAR
 # ============================================================================
 
+# Sidebar navigation entries (label, page) per role
+NAV_BY_ROLE = {
+    'admin': (
+        ("📊 Dashboard", "dashboard"),
+        ("📋 SCARs", "scars"),
+        ("🏢 Vendors", "vendors"),
+        ("👥 Users", "users"),
+    ),
+    'supplier': (
+        ("📊 Dashboard", "dashboard"),
+        ("📋 My SCARs", "scars"),
+    ),
+}
+
 def render_sidebar():
     with st.sidebar:
         # Logo using Streamlit native markdown
@@ -672,42 +993,32 @@ def render_sidebar():
         
         if check_login():
             user = st.session_state.user
+            snap = _sidebar_snapshot(user['id'])
             st.markdown(f"**User:** {user['username']}")
             st.markdown(f"**Role:** {user['role'].title()}")
-            if user.get('vendor_name'):
-                st.markdown(f"**Vendor:** {user['vendor_name']}")
+            if snap['vendor_name']:
+                st.markdown(f"**Vendor:** {snap['vendor_name']}")
             
             st.divider()
             
             # Navigation
             st.markdown("### Navigation")
             
-            if user['role'] == 'admin':
-                if st.button("📊 Dashboard", key="nav_dashboard", use_container_width=True):
-                    st.session_state.page = "dashboard"
-                    st.rerun()
-                if st.button("📋 SCARs", key="nav_scars", use_container_width=True):
-                    st.session_state.page = "scars"
-                    st.rerun()
-                if st.button("🏢 Vendors", key="nav_vendors", use_container_width=True):
-                    st.session_state.page = "vendors"
-                    st.rerun()
-                if st.button("👥 Users", key="nav_users", use_container_width=True):
-                    st.session_state.page = "users"
-                    st.rerun()
-            else:
-                if st.button("📊 Dashboard", key="nav_dashboard", use_container_width=True):
-                    st.session_state.page = "dashboard"
-                    st.rerun()
-                if st.button("📋 My SCARs", key="nav_scars", use_container_width=True):
-                    st.session_state.page = "scars"
-                    st.rerun()
+            # The page lives in the URL so back/forward and reloads keep it.
+            # It is dispatched after the sidebar renders, so the click's own
+            # rerun already picks up the new page.
+            for label, page in NAV_BY_ROLE.get(user['role'], NAV_BY_ROLE['supplier']):
+                if page == "users" and snap['pending']:
+                    label = f"{label} ({snap['pending']})"
+                if st.button(label, key=f"nav_{page}", use_container_width=True):
+                    st.query_params.clear()
+                    st.query_params["page"] = page
             
             st.divider()
             
             if st.button("🚪 Logout", key="nav_logout", use_container_width=True):
                 st.session_state.user = None
-                st.session_state.page = "login"
+                st.query_params.clear()
                 st.rerun()
         else:
             st.markdown("### SCAR Management")
@@ -717,6 +1028,24 @@ def render_sidebar():
 # LOGIN PAGE
 # ============================================================================
 
+def _submit_login():
+    """Sign-in form callback; runs before the rerun so that run renders signed in"""
+    username = st.session_state.login_username
+    password = st.session_state.login_password
+    
+    if not (username and password):
+        st.session_state.login_message = ("warning", "Please enter username and password")
+        return
+    
+    user = authenticate(username, password)
+    if not user:
+        st.session_state.login_message = ("error", "Invalid credentials")
+    elif user['status'] != 'approved':
+        st.session_state.login_message = ("error", "Your account is pending approval.")
+    else:
+        st.session_state.user = user
+        st.query_params["page"] = st.query_params.get("page", "dashboard")
+
 def login_page():
     st.markdown("# SCAR Management System")
     st.markdown("---")
@@ -727,24 +1056,17 @@ def login_page():
         st.subheader("Sign In")
         
         with st.form("login_form"):
-            username = st.text_input("Username")
-            password = st.text_input("Password", type="password")
-            submitted = st.form_submit_button("Sign In", use_container_width=True)
+            st.text_input("Username", key="login_username")
+            st.text_input("Password", type="password", key="login_password")
+            st.form_submit_button("Sign In", use_container_width=True, on_click=_submit_login)
             
-            if submitted:
-                if username and password:
-                    user = authenticate(username, password)
-                    if user:
-                        if user['status'] != 'approved':
-                            st.error("Your account is pending approval.")
-                        else:
-                            st.session_state.user = dict(user)
-                            st.session_state.page = "dashboard"
-                            st.rerun()
-                    else:
-                        st.error("Invalid credentials")
+            message = st.session_state.pop("login_message", None)
+            if message:
+                level, text = message
+                if level == "error":
+                    st.error(text)
                 else:
-                    st.warning("Please enter username and password")
+                    st.warning(text)
         
         # Demo credentials info
         st.divider()
@@ -755,6 +1077,71 @@ def login_page():
 # DASHBOARD PAGE
 # ============================================================================
 
+SQL_ADMIN_DASHBOARD_COUNTS = '''
+    SELECT
+        (SELECT COUNT(*) FROM scars) AS total,
+        (SELECT COUNT(*) FROM scars WHERE status = 'Open') AS open,
+        (SELECT COUNT(*) FROM scars WHERE status = 'Closed') AS closed,
+        (SELECT COUNT(*) FROM vendors WHERE status = 'active') AS vendors,
+        (SELECT COUNT(*) FROM users WHERE status = 'pending') AS pending
+'''
+
+SQL_VENDOR_DASHBOARD_COUNTS = '''
+    SELECT
+        COUNT(*) AS total,
+        COALESCE(SUM(status = 'Open'), 0) AS open,
+        COALESCE(SUM(status = 'Closed'), 0) AS closed
+    FROM scars
+    WHERE vendor_id = ?
+'''
+
+SQL_RECENT_SCARS_ADMIN = '''
+    SELECT s.scar_number, s.product_name, s.status, s.priority, s.created_at,
+           v.name as vendor_name
+    FROM scars s
+    LEFT JOIN vendors v ON s.vendor_id = v.id
+    ORDER BY s.created_at DESC
+    LIMIT 10
+'''
+
+SQL_RECENT_SCARS_VENDOR = '''
+    SELECT s.scar_number, s.product_name, s.status, s.priority, s.created_at,
+           v.name as vendor_name
+    FROM scars s
+    LEFT JOIN vendors v ON s.vendor_id = v.id
+    WHERE s.vendor_id = ?
+    ORDER BY s.created_at DESC
+    LIMIT 10
+'''
+
+@st.cache_data(ttl=30)
+def _recent_scars_html(role, vendor_id):
+    """Rendered Recent SCARs table for the role's scope; None if there are none"""
+    conn = get_db()
+    c = conn.cursor()
+    if role == 'admin':
+        c.execute(SQL_RECENT_SCARS_ADMIN)
+    else:
+        c.execute(SQL_RECENT_SCARS_VENDOR, (vendor_id,))
+    first = c.fetchone()
+    if first is None:
+        return None
+    
+    # Stream the cursor straight into the table instead of building a row list
+    headers = ["SCAR #", "Vendor", "Product", "Status", "Priority", "Created"]
+    rows = (
+        (
+            scar['scar_number'],
+            scar['vendor_name'] or '-',
+            scar['product_name'] or '-',
+            STATUS_BADGES.get(scar['status']) or get_status_badge(scar['status']),
+            scar['priority'],
+            scar['created_at'][:10] if scar['created_at'] else '-'
+        )
+        for scar in chain((first,), c)
+    )
+    return render_grid_table(headers, rows)
+
 def dashboard_page():
     require_login()
     user = st.session_state.user
@@ -764,34 +1151,16 @@ def dashboard_page():
     
     conn = get_db()
     c = conn.cursor()
+    # Counts are unpacked by position, so skip building sqlite3.Row objects
+    c.row_factory = None
     
-    # Get statistics based on role
+    # Get statistics based on role, each branch in a single round-trip
     if user['role'] == 'admin':
-        c.execute("SELECT COUNT(*) FROM scars")
-        total_scars = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM scars WHERE status = 'Open'")
-        open_scars = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM scars WHERE status = 'Closed'")
-        closed_scars = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM vendors WHERE status = 'active'")
-        active_vendors = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM users WHERE status = 'pending'")
-        pending_users = c.fetchone()[0]
+        c.execute(SQL_ADMIN_DASHBOARD_COUNTS)
+        total_scars, open_scars, closed_scars, active_vendors, pending_users = c.fetchone()
     else:
-        vendor_id = user['vendor_id']
-        c.execute("SELECT COUNT(*) FROM scars WHERE vendor_id = ?", (vendor_id,))
-        total_scars = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM scars WHERE vendor_id = ? AND status = 'Open'", (vendor_id,))
-        open_scars = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM scars WHERE vendor_id = ? AND status = 'Closed'", (vendor_id,))
-        closed_scars = c.fetchone()[0]
-        
+        c.execute(SQL_VENDOR_DASHBOARD_COUNTS, (user['vendor_id'],))
+        total_scars, open_scars, closed_scars = c.fetchone()
         active_vendors = None
         pending_users = None
     
@@ -811,58 +1180,45 @@ def dashboard_page():
         with col4:
             st.metric("Active Vendors", active_vendors)
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    st.html("<br>")
     
     # Recent SCARs
     st.markdown("### Recent SCARs")
     
-    if user['role'] == 'admin':
-        c.execute('''
-            SELECT s.*, v.name as vendor_name, v.code as vendor_code
-            FROM scars s
-            LEFT JOIN vendors v ON s.vendor_id = v.id
-            ORDER BY s.created_at DESC
-            LIMIT 10
-        ''')
-    else:
-        c.execute('''
-            SELECT s.*, v.name as vendor_name, v.code as vendor_code
-            FROM scars s
-            LEFT JOIN vendors v ON s.vendor_id = v.id
-            WHERE s.vendor_id = ?
-            ORDER BY s.created_at DESC
-            LIMIT 10
-        ''', (user['vendor_id'],))
-    
-    scars = c.fetchall()
-    conn.close()
-    
-    if scars:
-        headers = ["SCAR #", "Vendor", "Product", "Status", "Priority", "Created"]
-        rows = []
-        for scar in scars:
-            rows.append([
-                scar['scar_number'],
-                scar['vendor_name'] or '-',
-                scar['product_name'] or '-',
-                get_status_badge(scar['status']),
-                scar['priority'],
-                scar['created_at'][:10] if scar['created_at'] else '-'
-            ])
-        
-        st.markdown(render_grid_table(headers, rows), unsafe_allow_html=True)
+    recent_html = _recent_scars_html(user['role'], user['vendor_id'])
+    if recent_html:
+        st.html(recent_html)
     else:
         st.info("No SCARs found.")
     
     # Pending users alert for admin
     if user['role'] == 'admin' and pending_users > 0:
-        st.markdown("<br>", unsafe_allow_html=True)
+        st.html("<br>")
         st.warning(f"⚠️ {pending_users} user(s) pending approval. Go to Users to review.")
 
 # ============================================================================
 # SCARS PAGE
 # ============================================================================
 
+# Detail-form choices, with value -> position maps for the selectbox index
+_PRIORITIES = ("Low", "Medium", "High")
+_PRIORITY_IDX = {v: i for i, v in enumerate(_PRIORITIES)}
+_STATUSES = ("Open", "In Progress", "Closed")
+_STATUS_IDX = {v: i for i, v in enumerate(_STATUSES)}
+_NC_CATEGORIES = ("", "Dimensional", "Material", "Functional", "Documentation", "Other")
+_NC_CATEGORY_IDX = {v: i for i, v in enumerate(_NC_CATEGORIES)}
+_RCA_METHODS = ("", "5 Whys", "Fishbone/Ishikawa", "FMEA", "8D", "Other")
+_RCA_IDX = {v: i for i, v in enumerate(_RCA_METHODS)}
+_VERIFICATION_RESULTS = ("", "Effective", "Not Effective", "Pending")
+_VERIFICATION_IDX = {v: i for i, v in enumerate(_VERIFICATION_RESULTS)}
+
+@lru_cache(maxsize=1024)
+def _d(s):
+    """Stored ISO date string -> date for st.date_input; None when unset"""
+    return date.fromisoformat(s) if s else None
+
+SCAR_ACTION_CELL = '<span class="calyx-action" style="cursor: pointer;">View Details</span>'
+
 def scars_page():
     require_login()
     user = st.session_state.user
@@ -884,76 +1240,78 @@ def scars_page():
     with col2:
         priority_filter = st.selectbox("Priority", ["All", "High", "Medium", "Low"])
     
-    conn = get_db()
-    c = conn.cursor()
-    
-    # Build query
-    query = '''
-        SELECT s.*, v.name as vendor_name, v.code as vendor_code
-        FROM scars s
-        LEFT JOIN vendors v ON s.vendor_id = v.id
-        WHERE 1=1
-    '''
-    params = []
-    
-    if user['role'] != 'admin':
-        query += " AND s.vendor_id = ?"
-        params.append(user['vendor_id'])
+    # Keyset pager: one (created_at, id) cursor per page already passed; filters start over
+    filters = (status_filter, priority_filter)
+    if st.session_state.get('_scar_filters') != filters:
+        st.session_state._scar_filters = filters
+        st.session_state._scar_cursors = []
+    cursors = st.session_state._scar_cursors
     
-    if status_filter != "All":
-        query += " AND s.status = ?"
-        params.append(status_filter)
+    page = _fetch_scars(user['role'], user['vendor_id'], status_filter, priority_filter,
+                        cursors[-1] if cursors else None)
+    if not page and cursors:
+        # The page emptied under us (edits or deletes); go back to the first one
+        cursors.clear()
+        page = _fetch_scars(user['role'], user['vendor_id'], status_filter, priority_filter)
+    scars = page[:SCAR_PAGE_SIZE]
+    total = _count_scars(user['role'], user['vendor_id'], status_filter, priority_filter)
     
-    if priority_filter != "All":
-        query += " AND s.priority = ?"
-        params.append(priority_filter)
-    
-    query += " ORDER BY s.created_at DESC"
-    
-    c.execute(query, params)
-    scars = c.fetchall()
-    conn.close()
-    
-    st.markdown(f"### SCARs ({len(scars)} total)")
+    st.markdown(f"### SCARs ({total} total)")
     
     if scars:
         headers = ["SCAR #", "Vendor", "Product", "Status", "Priority", "Due Date", "Actions"]
-        rows = []
-        
-        for scar in scars:
-            action_btn = f'<span class="calyx-action" style="cursor: pointer;">View Details</span>'
-            rows.append([
-                scar['scar_number'],
-                f"{scar['vendor_code']} - {scar['vendor_name']}" if scar['vendor_name'] else '-',
-                scar['product_name'] or '-',
-                get_status_badge(scar['status']),
-                scar['priority'],
-                scar['due_date'] or '-',
-                action_btn
-            ])
-        
-        st.markdown(render_grid_table(headers, rows), unsafe_allow_html=True)
+        rows = [
+            (
+                number,
+                f"{vendor_code} - {vendor_name}" if vendor_name else '-',
+                product or '-',
+                STATUS_BADGES.get(status) or get_status_badge(status),
+                priority,
+                due or '-',
+                SCAR_ACTION_CELL,
+            )
+            for number, vendor_code, vendor_name, product, status, priority, due, *_ in scars
+        ]
+        
+        st.html(render_grid_table(headers, rows))
+        
+        if cursors or len(page) > SCAR_PAGE_SIZE:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("← Previous", disabled=not cursors, use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {len(cursors) + 1} of {-(-total // SCAR_PAGE_SIZE)}")
+            with col3:
+                if st.button("Next →", disabled=len(page) <= SCAR_PAGE_SIZE, use_container_width=True):
+                    cursors.append((scars[-1][7], scars[-1][8]))
+                    st.rerun()
         
         # SCAR details expansion
-        st.markdown("<br>", unsafe_allow_html=True)
+        st.html("<br>")
         st.markdown("### SCAR Details")
         
-        scar_numbers = [s['scar_number'] for s in scars]
-        selected_scar = st.selectbox("Select SCAR to view/edit:", ["Select..."] + scar_numbers)
+        scar_numbers = [row[0] for row in scars]
+        # Seed the picker from the URL so a shared or reloaded link reopens the SCAR
+        if "scar_select" not in st.session_state and st.query_params.get("scar") in scar_numbers:
+            st.session_state.scar_select = st.query_params["scar"]
+        selected_scar = st.selectbox("Select SCAR to view/edit:", ["Select..."] + scar_numbers, key="scar_select")
         
         if selected_scar != "Select...":
-            scar_detail_view(selected_scar)
+            st.query_params["scar"] = selected_scar
+            # One IN-list fetch serves every pick from this page; the picker only offers page rows
+            page_details = _fetch_scar_page(tuple(scar_numbers))
+            scar_detail_view(selected_scar, page_details.get(selected_scar))
+        else:
+            st.query_params.pop("scar", None)
     else:
         st.info("No SCARs found matching the criteria.")
 
 def create_scar_form():
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT id, name, code FROM vendors WHERE status = 'active' ORDER BY name")
-    vendors = c.fetchall()
-    conn.close()
-    
-    if not vendors:
+    vendor_labels, vendor_ids = _vendor_options()
+
+    if not vendor_labels:
         st.warning("No active vendors. Please add a vendor first.")
         return
     
@@ -961,13 +1319,12 @@ def create_scar_form():
         col1, col2 = st.columns(2)
         
         with col1:
-            vendor_options = {f"{v['code']} - {v['name']}": v['id'] for v in vendors}
-            selected_vendor = st.selectbox("Vendor *", options=list(vendor_options.keys()))
+            selected_vendor = st.selectbox("Vendor *", options=vendor_labels)
             product_name = st.text_input("Product Name *")
             part_number = st.text_input("Part Number")
         
         with col2:
-            priority = st.selectbox("Priority", ["Low", "Medium", "High"])
+            priority = st.selectbox("Priority", _PRIORITIES)
             due_date = st.date_input("Due Date")
             lot_number = st.text_input("Lot Number")
         
@@ -977,43 +1334,30 @@ def create_scar_form():
         
         if submitted:
             if selected_vendor and product_name and nc_description:
-                vendor_id = vendor_options[selected_vendor]
+                vendor_id = vendor_ids[selected_vendor]
                 scar_number = f"SCAR-{datetime.now().strftime('%Y%m%d%H%M%S')}"
                 
-                conn = get_db()
-                c = conn.cursor()
-                c.execute('''
-                    INSERT INTO scars (scar_number, vendor_id, product_name, part_number, 
-                                      lot_number, priority, due_date, nc_description, 
-                                      created_by, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'Open')
-                ''', (scar_number, vendor_id, product_name, part_number, lot_number, 
-                      priority, due_date, nc_description, st.session_state.user['id']))
-                
-                # Log activity
-                c.execute('''
-                    INSERT INTO activity_log (scar_id, user_id, action, details)
-                    VALUES (?, ?, ?, ?)
-                ''', (c.lastrowid, st.session_state.user['id'], 'Created', f'SCAR {scar_number} created'))
-                
-                conn.commit()
-                conn.close()
+                with write_transaction() as conn:
+                    c = conn.execute('''
+                        INSERT INTO scars (scar_number, vendor_id, product_name, part_number, 
+                                          lot_number, priority, due_date, nc_description, 
+                                          created_by, status)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'Open')
+                    ''', (scar_number, vendor_id, product_name, part_number, lot_number, 
+                          priority, due_date, nc_description, st.session_state.user['id']))
+                    log_activity(conn, c.lastrowid, st.session_state.user['id'], 'Created', f'SCAR {scar_number} created')
+                clear_scar_cache()
                 
                 st.success(f"SCAR {scar_number} created successfully!")
                 st.rerun()
             else:
                 st.error("Please fill in all required fields.")
 
-def scar_detail_view(scar_number):
+def scar_detail_view(scar_number, scar=None):
     conn = get_db()
     c = conn.cursor()
-    c.execute('''
-        SELECT s.*, v.name as vendor_name, v.code as vendor_code
-        FROM scars s
-        LEFT JOIN vendors v ON s.vendor_id = v.id
-        WHERE s.scar_number = ?
-    ''', (scar_number,))
-    scar = c.fetchone()
+    if scar is None:
+        scar = _fetch_scar(scar_number)
     
     if not scar:
         st.error("SCAR not found")
@@ -1021,6 +1365,12 @@ def scar_detail_view(scar_number):
     
     user = st.session_state.user
     is_admin = user['role'] == 'admin'
+    # Pre-edit snapshot the tab forms diff against so only changed columns are written
+    orig = dict(scar)
+    # Form widgets are keyed per SCAR and generation; Save and Discard bump the
+    # generation so the inputs reset to the stored row
+    form_gen = st.session_state.setdefault('_scar_form_gen', {}).get(scar['id'], 0)
+    form_prefix = f"scar_{scar['id']}_{form_gen}_"
     
     # SCAR Header
     col1, col2 = st.columns([3, 1])
@@ -1048,161 +1398,124 @@ def scar_detail_view(scar_number):
         with st.form("scar_details_form"):
             col1, col2 = st.columns(2)
             with col1:
-                product_name = st.text_input("Product Name", value=scar['product_name'] or '')
-                part_number = st.text_input("Part Number", value=scar['part_number'] or '')
-                lot_number = st.text_input("Lot Number", value=scar['lot_number'] or '')
+                product_name = st.text_input("Product Name", value=scar['product_name'] or '', key=f"{form_prefix}product_name")
+                part_number = st.text_input("Part Number", value=scar['part_number'] or '', key=f"{form_prefix}part_number")
+                lot_number = st.text_input("Lot Number", value=scar['lot_number'] or '', key=f"{form_prefix}lot_number")
             with col2:
-                quantity_affected = st.number_input("Quantity Affected", value=scar['quantity_affected'] or 0)
-                priority = st.selectbox("Priority", ["Low", "Medium", "High"], 
-                                       index=["Low", "Medium", "High"].index(scar['priority']))
-                status = st.selectbox("Status", ["Open", "In Progress", "Closed"],
-                                     index=["Open", "In Progress", "Closed"].index(scar['status']) if scar['status'] in ["Open", "In Progress", "Closed"] else 0,
-                                     disabled=not is_admin)
+                quantity_affected = st.number_input("Quantity Affected", value=scar['quantity_affected'] or 0, key=f"{form_prefix}quantity_affected")
+                priority = st.selectbox("Priority", _PRIORITIES, 
+                                       index=_PRIORITY_IDX.get(scar['priority'], 0), key=f"{form_prefix}priority")
+                status = st.selectbox("Status", _STATUSES,
+                                     index=_STATUS_IDX.get(scar['status'], 0),
+                                     disabled=not is_admin, key=f"{form_prefix}status")
             
             if st.form_submit_button("Update Details", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET product_name=?, part_number=?, lot_number=?, 
-                                    quantity_affected=?, priority=?, status=?
-                    WHERE id=?
-                ''', (product_name, part_number, lot_number, quantity_affected, priority, status, scar['id']))
-                conn.commit()
-                st.success("Details updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'product_name': product_name, 'part_number': part_number, 'lot_number': lot_number, 'quantity_affected': quantity_affected, 'priority': priority, 'status': status})
+                stage_scar_changes(scar['id'], "Details updated", changes)
     
     # Tab 2: Non-Conformity
     with tabs[1]:
         with st.form("nc_form"):
             nc_description = st.text_area("Non-Conformity Description", 
-                                         value=scar['nc_description'] or '', height=150)
+                                         value=scar['nc_description'] or '', height=150, key=f"{form_prefix}nc_description")
             nc_category = st.selectbox("Category", 
-                                      ["", "Dimensional", "Material", "Functional", "Documentation", "Other"],
-                                      index=["", "Dimensional", "Material", "Functional", "Documentation", "Other"].index(scar['nc_category']) if scar['nc_category'] else 0)
-            detection_method = st.text_input("Detection Method", value=scar['detection_method'] or '')
+                                      _NC_CATEGORIES,
+                                      index=_NC_CATEGORY_IDX.get(scar['nc_category'] or "", 0), key=f"{form_prefix}nc_category")
+            detection_method = st.text_input("Detection Method", value=scar['detection_method'] or '', key=f"{form_prefix}detection_method")
             
             if st.form_submit_button("Update Non-Conformity", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET nc_description=?, nc_category=?, detection_method=?
-                    WHERE id=?
-                ''', (nc_description, nc_category, detection_method, scar['id']))
-                conn.commit()
-                st.success("Non-conformity details updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'nc_description': nc_description, 'nc_category': nc_category, 'detection_method': detection_method})
+                stage_scar_changes(scar['id'], "Non-conformity details updated", changes)
     
     # Tab 3: Containment
     with tabs[2]:
         with st.form("containment_form"):
             containment_actions = st.text_area("Containment Actions", 
-                                              value=scar['containment_actions'] or '', height=150)
+                                              value=scar['containment_actions'] or '', height=150, key=f"{form_prefix}containment_actions")
             col1, col2 = st.columns(2)
             with col1:
                 containment_date = st.date_input("Containment Date", 
-                                                value=datetime.strptime(scar['containment_date'], '%Y-%m-%d').date() if scar['containment_date'] else None)
+                                                value=_d(scar['containment_date']), key=f"{form_prefix}containment_date")
             with col2:
                 containment_responsible = st.text_input("Responsible Party", 
-                                                       value=scar['containment_responsible'] or '')
+                                                       value=scar['containment_responsible'] or '', key=f"{form_prefix}containment_responsible")
             
             if st.form_submit_button("Update Containment", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET containment_actions=?, containment_date=?, containment_responsible=?
-                    WHERE id=?
-                ''', (containment_actions, containment_date, containment_responsible, scar['id']))
-                conn.commit()
-                st.success("Containment actions updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'containment_actions': containment_actions, 'containment_date': containment_date, 'containment_responsible': containment_responsible})
+                stage_scar_changes(scar['id'], "Containment actions updated", changes)
     
     # Tab 4: Root Cause
     with tabs[3]:
         with st.form("rca_form"):
             root_cause = st.text_area("Root Cause Analysis", 
-                                     value=scar['root_cause'] or '', height=150)
+                                     value=scar['root_cause'] or '', height=150, key=f"{form_prefix}root_cause")
             col1, col2 = st.columns(2)
             with col1:
                 rca_method = st.selectbox("Analysis Method", 
-                                         ["", "5 Whys", "Fishbone/Ishikawa", "FMEA", "8D", "Other"],
-                                         index=["", "5 Whys", "Fishbone/Ishikawa", "FMEA", "8D", "Other"].index(scar['rca_method']) if scar['rca_method'] else 0)
+                                         _RCA_METHODS,
+                                         index=_RCA_IDX.get(scar['rca_method'] or "", 0), key=f"{form_prefix}rca_method")
             with col2:
                 rca_completed_date = st.date_input("RCA Completed Date",
-                                                   value=datetime.strptime(scar['rca_completed_date'], '%Y-%m-%d').date() if scar['rca_completed_date'] else None)
+                                                   value=_d(scar['rca_completed_date']), key=f"{form_prefix}rca_completed_date")
             
             if st.form_submit_button("Update Root Cause", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET root_cause=?, rca_method=?, rca_completed_date=?
-                    WHERE id=?
-                ''', (root_cause, rca_method, rca_completed_date, scar['id']))
-                conn.commit()
-                st.success("Root cause analysis updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'root_cause': root_cause, 'rca_method': rca_method, 'rca_completed_date': rca_completed_date})
+                stage_scar_changes(scar['id'], "Root cause analysis updated", changes)
     
     # Tab 5: Corrective Action
     with tabs[4]:
         with st.form("ca_form"):
             corrective_action = st.text_area("Corrective Action", 
-                                            value=scar['corrective_action'] or '', height=150)
+                                            value=scar['corrective_action'] or '', height=150, key=f"{form_prefix}corrective_action")
             col1, col2 = st.columns(2)
             with col1:
-                ca_responsible = st.text_input("Responsible Party", value=scar['ca_responsible'] or '')
+                ca_responsible = st.text_input("Responsible Party", value=scar['ca_responsible'] or '', key=f"{form_prefix}ca_responsible")
                 ca_target_date = st.date_input("Target Date",
-                                               value=datetime.strptime(scar['ca_target_date'], '%Y-%m-%d').date() if scar['ca_target_date'] else None)
+                                               value=_d(scar['ca_target_date']), key=f"{form_prefix}ca_target_date")
             with col2:
                 ca_completion_date = st.date_input("Completion Date",
-                                                   value=datetime.strptime(scar['ca_completion_date'], '%Y-%m-%d').date() if scar['ca_completion_date'] else None)
+                                                   value=_d(scar['ca_completion_date']), key=f"{form_prefix}ca_completion_date")
             
             if st.form_submit_button("Update Corrective Action", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET corrective_action=?, ca_responsible=?, ca_target_date=?, ca_completion_date=?
-                    WHERE id=?
-                ''', (corrective_action, ca_responsible, ca_target_date, ca_completion_date, scar['id']))
-                conn.commit()
-                st.success("Corrective action updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'corrective_action': corrective_action, 'ca_responsible': ca_responsible, 'ca_target_date': ca_target_date, 'ca_completion_date': ca_completion_date})
+                stage_scar_changes(scar['id'], "Corrective action updated", changes)
     
     # Tab 6: Preventive Action
     with tabs[5]:
         with st.form("pa_form"):
             preventive_action = st.text_area("Preventive Action", 
-                                            value=scar['preventive_action'] or '', height=150)
+                                            value=scar['preventive_action'] or '', height=150, key=f"{form_prefix}preventive_action")
             col1, col2 = st.columns(2)
             with col1:
-                pa_responsible = st.text_input("Responsible Party", value=scar['pa_responsible'] or '')
+                pa_responsible = st.text_input("Responsible Party", value=scar['pa_responsible'] or '', key=f"{form_prefix}pa_responsible")
             with col2:
                 pa_target_date = st.date_input("Target Date",
-                                               value=datetime.strptime(scar['pa_target_date'], '%Y-%m-%d').date() if scar['pa_target_date'] else None)
+                                               value=_d(scar['pa_target_date']), key=f"{form_prefix}pa_target_date")
             
             if st.form_submit_button("Update Preventive Action", use_container_width=True):
-                c.execute('''
-                    UPDATE scars SET preventive_action=?, pa_responsible=?, pa_target_date=?
-                    WHERE id=?
-                ''', (preventive_action, pa_responsible, pa_target_date, scar['id']))
-                conn.commit()
-                st.success("Preventive action updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'preventive_action': preventive_action, 'pa_responsible': pa_responsible, 'pa_target_date': pa_target_date})
+                stage_scar_changes(scar['id'], "Preventive action updated", changes)
     
     # Tab 7: Verification
     with tabs[6]:
         with st.form("verification_form"):
             verification_method = st.text_area("Verification Method", 
-                                              value=scar['verification_method'] or '', height=100)
+                                              value=scar['verification_method'] or '', height=100, key=f"{form_prefix}verification_method")
             verification_result = st.selectbox("Result", 
-                                              ["", "Effective", "Not Effective", "Pending"],
-                                              index=["", "Effective", "Not Effective", "Pending"].index(scar['verification_result']) if scar['verification_result'] else 0,
-                                              disabled=not is_admin)
+                                              _VERIFICATION_RESULTS,
+                                              index=_VERIFICATION_IDX.get(scar['verification_result'] or "", 0),
+                                              disabled=not is_admin, key=f"{form_prefix}verification_result")
             col1, col2 = st.columns(2)
             with col1:
                 verification_date = st.date_input("Verification Date",
-                                                  value=datetime.strptime(scar['verification_date'], '%Y-%m-%d').date() if scar['verification_date'] else None,
-                                                  disabled=not is_admin)
+                                                  value=_d(scar['verification_date']),
+                                                  disabled=not is_admin, key=f"{form_prefix}verification_date")
             with col2:
-                verified_by = st.text_input("Verified By", value=scar['verified_by'] or '', disabled=not is_admin)
+                verified_by = st.text_input("Verified By", value=scar['verified_by'] or '', disabled=not is_admin, key=f"{form_prefix}verified_by")
             
             if st.form_submit_button("Update Verification", use_container_width=True, disabled=not is_admin):
-                c.execute('''
-                    UPDATE scars SET verification_method=?, verification_result=?, 
-                                    verification_date=?, verified_by=?
-                    WHERE id=?
-                ''', (verification_method, verification_result, verification_date, verified_by, scar['id']))
-                conn.commit()
-                st.success("Verification updated!")
-                st.rerun()
+                changes = scar_changes(orig, {'verification_method': verification_method, 'verification_result': verification_result, 'verification_date': verification_date, 'verified_by': verified_by})
+                stage_scar_changes(scar['id'], "Verification updated", changes)
     
     # Tab 8: Activity Log
     with tabs[7]:
@@ -1225,11 +1538,33 @@ def scar_detail_view(scar_number):
                     act['action'],
                     act['details'] or '-'
                 ])
-            st.markdown(render_grid_table(headers, rows), unsafe_allow_html=True)
+            st.html(render_grid_table(headers, rows))
         else:
             st.info("No activity recorded yet.")
     
-    conn.close()
+    # Staged tab edits go out as one UPDATE and one activity batch in a single commit
+    pending = st.session_state.get('_pending_updates', {}).get(scar['id'])
+    if pending:
+        st.markdown("---")
+        st.caption("Unsaved: " + ", ".join(pending))
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Save Changes", type="primary", use_container_width=True, key=f"save_scar_{scar['id']}"):
+                changes = {}
+                for tab_changes in pending.values():
+                    changes.update(tab_changes)
+                with write_transaction() as conn:
+                    update_scar_fields(conn, scar['id'], changes)
+                    log_activities(conn, [(scar['id'], user['id'], 'Updated', summary) for summary in pending])
+                del st.session_state._pending_updates[scar['id']]
+                st.session_state._scar_form_gen[scar['id']] = form_gen + 1
+                clear_scar_cache()
+                st.rerun()
+        with col2:
+            if st.button("Discard", use_container_width=True, key=f"discard_scar_{scar['id']}"):
+                del st.session_state._pending_updates[scar['id']]
+                st.session_state._scar_form_gen[scar['id']] = form_gen + 1
+                st.rerun()
 
 # ============================================================================
 # VENDORS PAGE
@@ -1258,36 +1593,24 @@ def vendors_page():
             
             if st.form_submit_button("Add Vendor", use_container_width=True):
                 if vendor_name and vendor_code:
-                    conn = get_db()
-                    c = conn.cursor()
                     try:
-                        c.execute('''
-                            INSERT INTO vendors (name, code, contact_name, contact_email, 
-                                               contact_phone, address, status)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (vendor_name, vendor_code, contact_name, contact_email, 
-                              contact_phone, address, status))
-                        conn.commit()
+                        with write_transaction() as conn:
+                            conn.execute('''
+                                INSERT INTO vendors (name, code, contact_name, contact_email, 
+                                                   contact_phone, address, status)
+                                VALUES (?, ?, ?, ?, ?, ?, ?)
+                            ''', (vendor_name, vendor_code, contact_name, contact_email, 
+                                  contact_phone, address, status))
+                        clear_vendor_cache()
                         st.success(f"Vendor '{vendor_name}' added successfully!")
                         st.rerun()
                     except sqlite3.IntegrityError:
                         st.error("Vendor code already exists.")
-                    finally:
-                        conn.close()
                 else:
                     st.error("Please fill in required fields.")
     
     # Vendor list
-    conn = get_db()
-    c = conn.cursor()
-    c.execute('''
-        SELECT v.*, 
-               (SELECT COUNT(*) FROM scars WHERE vendor_id = v.id) as scar_count
-        FROM vendors v
-        ORDER BY v.name
-    ''')
-    vendors = c.fetchall()
-    conn.close()
+    vendors = _fetch_vendors()
     
     st.markdown(f"### Vendors ({len(vendors)} total)")
     
@@ -1295,7 +1618,7 @@ def vendors_page():
         headers = ["Code", "Name", "Contact", "Email", "Phone", "Status", "SCARs"]
         rows = []
         for vendor in vendors:
-            status_badge = '<span class="status-badge status-closed">ACTIVE</span>' if vendor['status'] == 'active' else '<span class="status-badge status-pending">INACTIVE</span>'
+            status_badge = VENDOR_STATUS_BADGES['active' if vendor['status'] == 'active' else 'inactive']
             rows.append([
                 vendor['code'],
                 vendor['name'],
@@ -1306,10 +1629,10 @@ def vendors_page():
                 str(vendor['scar_count'])
             ])
         
-        st.markdown(render_grid_table(headers, rows), unsafe_allow_html=True)
+        st.html(render_grid_table(headers, rows))
         
         # Edit vendor
-        st.markdown("<br>", unsafe_allow_html=True)
+        st.html("<br>")
         st.markdown("### Edit Vendor")
         
         vendor_options = {f"{v['code']} - {v['name']}": v['id'] for v in vendors}
@@ -1321,7 +1644,6 @@ def vendors_page():
             c = conn.cursor()
             c.execute("SELECT * FROM vendors WHERE id = ?", (vendor_id,))
             vendor = c.fetchone()
-            conn.close()
             
             if vendor:
                 with st.form("edit_vendor_form"):
@@ -1338,15 +1660,13 @@ def vendors_page():
                     edit_address = st.text_area("Address", value=vendor['address'] or '')
                     
                     if st.form_submit_button("Update Vendor", use_container_width=True):
-                        conn = get_db()
-                        c = conn.cursor()
-                        c.execute('''
-                            UPDATE vendors SET name=?, contact_name=?, contact_email=?,
-                                              contact_phone=?, address=?, status=?
-                            WHERE id=?
-                        ''', (edit_name, edit_contact, edit_email, edit_phone, edit_address, edit_status, vendor_id))
-                        conn.commit()
-                        conn.close()
+                        with write_transaction() as conn:
+                            conn.execute('''
+                                UPDATE vendors SET name=?, contact_name=?, contact_email=?,
+                                                  contact_phone=?, address=?, status=?
+                                WHERE id=?
+                            ''', (edit_name, edit_contact, edit_email, edit_phone, edit_address, edit_status, vendor_id))
+                        clear_vendor_cache()
                         st.success("Vendor updated!")
                         st.rerun()
     else:
@@ -1366,17 +1686,15 @@ def users_page():
     c = conn.cursor()
     
     # Pending approvals alert
-    c.execute("SELECT COUNT(*) FROM users WHERE status = 'pending'")
-    pending_count = c.fetchone()[0]
+    pending_count = _cached_pending_count()
     
     if pending_count > 0:
         st.warning(f"⚠️ {pending_count} user(s) pending approval")
     
     # Create new user
     with st.expander("➕ Add New User", expanded=False):
-        c.execute("SELECT id, name, code FROM vendors WHERE status = 'active' ORDER BY name")
-        vendors = c.fetchall()
-        
+        vendor_labels, vendor_ids = _vendor_options()
+
         with st.form("new_user_form"):
             col1, col2 = st.columns(2)
             with col1:
@@ -1384,10 +1702,8 @@ def users_page():
                 new_password = st.text_input("Password *", type="password")
             with col2:
                 new_role = st.selectbox("Role", ["supplier", "admin"])
-                if new_role == "supplier" and vendors:
-                    vendor_options = {"None": None}
-                    vendor_options.update({f"{v['code']} - {v['name']}": v['id'] for v in vendors})
-                    new_vendor = st.selectbox("Assign to Vendor", options=list(vendor_options.keys()))
+                if new_role == "supplier" and vendor_labels:
+                    new_vendor = st.selectbox("Assign to Vendor", options=("None",) + vendor_labels)
                 else:
                     new_vendor = None
             
@@ -1396,12 +1712,13 @@ def users_page():
             if st.form_submit_button("Create User", use_container_width=True):
                 if new_username and new_password:
                     try:
-                        vendor_id = vendor_options.get(new_vendor) if new_vendor else None
-                        c.execute('''
-                            INSERT INTO users (username, password_hash, role, vendor_id, status)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (new_username, hash_password(new_password), new_role, vendor_id, new_status))
-                        conn.commit()
+                        vendor_id = vendor_ids.get(new_vendor) if new_vendor else None
+                        with write_transaction() as conn:
+                            conn.execute('''
+                                INSERT INTO users (username, password_hash, role, vendor_id, status)
+                                VALUES (?, ?, ?, ?, ?)
+                            ''', (new_username, hash_password(new_password), new_role, vendor_id, new_status))
+                        clear_user_cache()
                         st.success(f"User '{new_username}' created!")
                         st.rerun()
                     except sqlite3.IntegrityError:
@@ -1417,7 +1734,6 @@ def users_page():
         ORDER BY u.created_at DESC
     ''')
     users = c.fetchall()
-    conn.close()
     
     st.markdown(f"### Users ({len(users)} total)")
     
@@ -1426,19 +1742,19 @@ def users_page():
         rows = []
         for user in users:
             vendor_info = f"{user['vendor_code']} - {user['vendor_name']}" if user['vendor_name'] else '-'
-            status_badge = get_status_badge('approved' if user['status'] == 'approved' else 'pending')
+            status_badge = STATUS_BADGES['approved' if user['status'] == 'approved' else 'pending']
             rows.append([
                 user['username'],
-                get_role_badge(user['role']),
+                ROLE_BADGES.get(user['role']) or get_role_badge(user['role']),
                 vendor_info,
                 status_badge,
                 user['created_at'][:10] if user['created_at'] else '-'
             ])
         
-        st.markdown(render_grid_table(headers, rows), unsafe_allow_html=True)
+        st.html(render_grid_table(headers, rows))
         
         # User management actions
-        st.markdown("<br>", unsafe_allow_html=True)
+        st.html("<br>")
         st.markdown("### User Actions")
         
         user_options = {u['username']: u['id'] for u in users if u['username'] != 'admin'}
@@ -1457,8 +1773,9 @@ def users_page():
             with col1:
                 if user['status'] == 'pending':
                     if st.button("✓ Approve User", use_container_width=True):
-                        c.execute("UPDATE users SET status = 'approved' WHERE id = ?", (user_id,))
-                        conn.commit()
+                        with write_transaction() as conn:
+                            conn.execute("UPDATE users SET status = 'approved' WHERE id = ?", (user_id,))
+                        clear_user_cache()
                         st.success("User approved!")
                         st.rerun()
                 else:
@@ -1467,19 +1784,19 @@ def users_page():
             with col2:
                 if st.button("🔑 Reset Password", use_container_width=True):
                     new_pw = "password123"
-                    c.execute("UPDATE users SET password_hash = ? WHERE id = ?", 
-                             (hash_password(new_pw), user_id))
-                    conn.commit()
+                    with write_transaction() as conn:
+                        conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", 
+                                 (hash_password(new_pw), user_id))
+                    clear_user_cache()
                     st.success(f"Password reset to: {new_pw}")
             
             with col3:
                 if st.button("🗑️ Delete User", use_container_width=True, type="secondary"):
-                    c.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                    conn.commit()
+                    with write_transaction() as conn:
+                        conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+                    clear_user_cache()
                     st.success("User deleted!")
                     st.rerun()
-            
-            conn.close()
     else:
         st.info("No users found.")
 
@@ -1487,6 +1804,15 @@ def users_page():
 # MAIN APP
 # ============================================================================
 
+# Page name -> view function, resolved once at import
+_PAGES = {
+    "login": login_page,
+    "dashboard": dashboard_page,
+    "scars": scars_page,
+    "vendors": vendors_page,
+    "users": users_page,
+}
+
 def main():
     st.set_page_config(
         page_title="Calyx Containers | SCAR Management",
@@ -1495,37 +1821,25 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Apply Calyx brand styles
-    st.markdown(get_calyx_styles(), unsafe_allow_html=True)
-    
-    # Initialize database
-    init_db()
+    # Initialize database (once per process)
+    _ensure_db()
     
     # Initialize session state
     if 'user' not in st.session_state:
         st.session_state.user = None
-    if 'page' not in st.session_state:
-        st.session_state.page = "login"
     
     # Render sidebar
     render_sidebar()
     
-    # Route to appropriate page
-    if not check_login():
-        login_page()
-    else:
-        page = st.session_state.page
-        
-        if page == "dashboard":
-            dashboard_page()
-        elif page == "scars":
-            scars_page()
-        elif page == "vendors":
-            vendors_page()
-        elif page == "users":
-            users_page()
-        else:
-            dashboard_page()
+    # Apply Calyx brand styles after the sidebar text has been sent, from a
+    # slot whose position doesn't move when the main page changes. st.html
+    # hands the constant straight to the DOM without the markdown parser.
+    with st.sidebar:
+        st.html(CALYX_CSS)
+    
+    # Route to appropriate page; signed-out sessions always land on login
+    page = st.query_params.get("page", "dashboard") if check_login() else "login"
+    _PAGES.get(page, dashboard_page)()
 
 if __name__ == "__main__":
     main()
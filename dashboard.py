@@ -3,18 +3,20 @@ Dashboard Page - Overview of SCAR statistics and recent activity
 """
 
 import streamlit as st
-from datetime import datetime
-from database import get_scar_stats, get_all_scars
+from datetime import date
+from functools import lru_cache
+from database import get_scar_stats, get_recent_scars
 
-def format_date(date_str):
-    """Format date string for display"""
-    if not date_str:
-        return "N/A"
+# Date cells are real dates; the table formats them client-side
+DATE_COLUMN = st.column_config.DateColumn(format="MMM DD, YYYY")
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """Parse the date part of an ISO string, or None if missing/invalid"""
     try:
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        return dt.strftime("%b %d, %Y")
-    except:
-        return date_str
+        return date.fromisoformat(date_str[:10])
+    except (TypeError, ValueError):
+        return None
 
 def show():
     """Display dashboard page"""
@@ -41,78 +43,61 @@ def show():
     # Stats
     stats = get_scar_stats(vendor_id)
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📂 Open SCARs</h3>
-            <div class="value">{stats.get('open', 0)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📤 Awaiting Review</h3>
-            <div class="value">{stats.get('submitted', 0)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>⚠️ Overdue</h3>
-            <div class="value" style="color: {'#DC2626' if stats.get('overdue', 0) > 0 else '#111827'};">{stats.get('overdue', 0)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>✅ Closed</h3>
-            <div class="value">{stats.get('closed', 0)}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    overdue_color = '#DC2626' if stats.get('overdue', 0) > 0 else '#111827'
+    cards = [
+        ("📂 Open SCARs", stats.get('open', 0), ""),
+        ("📤 Awaiting Review", stats.get('submitted', 0), ""),
+        ("⚠️ Overdue", stats.get('overdue', 0), f' style="color: {overdue_color};"'),
+        ("✅ Closed", stats.get('closed', 0), ""),
+    ]
+    cards_html = "".join(
+        f'<div class="metric-card"><h3>{label}</h3><div class="value"{style}>{value}</div></div>'
+        for label, value, style in cards
+    )
+    st.markdown(
+        f'<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">{cards_html}</div>',
+        unsafe_allow_html=True
+    )
     
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Recent SCARs
     st.markdown("### Recent SCARs")
     
-    scars = get_all_scars(vendor_id=vendor_id)[:5]
+    scars = get_recent_scars(vendor_id=vendor_id, limit=5)
     
     if not scars:
         st.info("No SCARs found. " + ("Create your first SCAR to get started." if is_admin else "No SCARs have been assigned to your organization."))
     else:
+        rows = []
         for scar in scars:
-            with st.container():
-                col1, col2, col3, col4 = st.columns([2, 3, 2, 1])
-                
-                with col1:
-                    st.markdown(f"**{scar['scar_number']}**")
-                    status_class = f"badge-{scar['status']}"
-                    st.markdown(f'<span class="badge {status_class}">{scar["status"].upper()}</span>', unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown(f"{scar.get('product_name') or scar.get('defect_type') or 'No description'}")
-                    if is_admin:
-                        st.caption(f"Vendor: {scar.get('vendor_name', 'Unassigned')}")
-                    else:
-                        st.caption(f"Due: {format_date(scar.get('response_due_date'))}")
-                
-                with col3:
-                    if scar.get('severity'):
-                        severity_class = f"badge-{scar['severity']}"
-                        st.markdown(f'<span class="badge {severity_class}">{scar["severity"].upper()}</span>', unsafe_allow_html=True)
-                
-                with col4:
-                    if st.button("View →", key=f"view_{scar['id']}", use_container_width=True):
-                        st.session_state.selected_scar_id = scar['id']
-                        st.session_state.page = "scar_detail"
-                        st.rerun()
-                
-                st.markdown("---")
+            row = {
+                "SCAR #": scar['scar_number'],
+                "Status": scar['status'].upper(),
+                "Description": scar.get('product_name') or scar.get('defect_type') or 'No description',
+            }
+            if is_admin:
+                row["Vendor"] = scar.get('vendor_name') or 'Unassigned'
+            else:
+                row["Due"] = parse_date(scar.get('response_due_date'))
+            row["Severity"] = (scar.get('severity') or '').upper()
+            rows.append(row)
+        
+        event = st.dataframe(
+            rows,
+            key="recent_scars_table",
+            hide_index=True,
+            use_container_width=True,
+            column_config={"Due": DATE_COLUMN},
+            on_select="rerun",
+            selection_mode="single-row",
+        )
+        
+        if event.selection.rows:
+            st.session_state.selected_scar_id = scars[event.selection.rows[0]]['id']
+            st.session_state.page = "scar_detail"
+            st.session_state.pop("recent_scars_table", None)
+            st.rerun()
     
     # Quick action for suppliers with open SCARs
     if not is_admin and stats.get('open', 0) > 0:
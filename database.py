@@ -4,29 +4,121 @@ Handles all SQLite operations for users, vendors, and SCARs
 """
 
 import sqlite3
+import streamlit as st
 import hashlib
+import hmac
+import os
+import queue
+import threading
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from contextlib import contextmanager
+from functools import wraps
 from pathlib import Path
 
 DATABASE_PATH = Path(__file__).parent / "data" / "scar.db"
 
+# SQL expression for new row ids, generated inside SQLite
+_NEW_ID = "lower(hex(randomblob(16)))"
+
+# Bump when init_database gains new DDL so existing files re-run it
+SCHEMA_VERSION = 4
+_initialized = False
+
+# Insertable SCAR columns, in table order
+SCAR_COLUMNS = (
+    "id", "scar_number", "status",
+    "date_issued", "response_due_date", "vendor_id", "vendor_contact_id",
+    "ncr_number", "po_so_number", "part_sku_number", "affected_quantity", "lot_numbers",
+    "product_name", "defect_type", "nonconformity_description", "severity",
+    "containment_isolate", "containment_screen_sort", "containment_prepared_by", "containment_date",
+    "root_cause", "root_cause_evidence", "root_cause_approved_by", "root_cause_date",
+    "corrective_action", "correction_approved_by", "correction_date",
+    "preventive_action", "prevention_approved_by", "prevention_date",
+    "verification_acceptable", "effectiveness_check", "verified_by", "verification_date",
+    "created_by",
+)
+
+_scrypt = hashlib.scrypt
+
+def _derive_key(password: str, salt: bytes) -> bytes:
+    """Derive a 32-byte scrypt key for password and salt"""
+    return _scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1, dklen=32)
+
 def get_password_hash(password: str) -> str:
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using salted scrypt, stored as salt$hash"""
+    salt = os.urandom(16)
+    return f"{salt.hex()}${_derive_key(password, salt).hex()}"
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
-    return get_password_hash(password) == hashed
+    try:
+        if "$" not in hashed:
+            # Legacy unsalted SHA-256 hashes
+            return hmac.compare_digest(hashlib.sha256(password.encode()).digest(), bytes.fromhex(hashed))
+        salt, digest = hashed.split("$", 1)
+        return hmac.compare_digest(_derive_key(password, bytes.fromhex(salt)), bytes.fromhex(digest))
+    except ValueError:
+        # Not a hash this module produced
+        return False
+
+def _dict_factory(cursor, row) -> dict:
+    """Build each result row directly as a dict keyed by column name"""
+    return dict(zip([col[0] for col in cursor.description], row))
+
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections"""
+
+    def __init__(self, path: Path, size: int = 5):
+        self.path = path
+        self.size = size
+        self._pool = queue.Queue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, cached_statements=256)
+        conn.row_factory = _dict_factory
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -20000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 134217728")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection, opening one while the pool is below size"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._pool.get()
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool"""
+        self._pool.put(conn)
+
+_pool = ConnectionPool(DATABASE_PATH)
 
 @contextmanager
 def get_db():
     """Context manager for database connections"""
-    DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(DATABASE_PATH))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn = _pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -34,13 +126,36 @@ def get_db():
         conn.rollback()
         raise
     finally:
-        conn.close()
+        _pool.release(conn)
+
+def _flagged_update(table: str, fields: tuple, extra: str = "") -> str:
+    """Build one constant UPDATE that only overwrites columns whose flag is bound true"""
+    assignments = ", ".join(f"{f} = CASE WHEN ? THEN ? ELSE {f} END" for f in fields)
+    return f"UPDATE {table} SET {assignments}{extra} WHERE id = ?"
+
+def _flagged_params(fields: tuple, updates: dict, row_id: str) -> list:
+    """Bind (is_set, value) pairs for each field, then the row id"""
+    params = []
+    for f in fields:
+        params += (f in updates, updates.get(f))
+    params.append(row_id)
+    return params
 
 def init_database():
     """Initialize database schema and seed data"""
+    global _initialized
+    if _initialized:
+        return
+    
     with get_db() as conn:
         cursor = conn.cursor()
         
+        # Schema already at the current version; skip the DDL
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()['user_version'] >= SCHEMA_VERSION:
+            _initialized = True
+            return
+        
         # Create vendors table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS vendors (
@@ -135,6 +250,7 @@ def init_database():
                 created_by TEXT,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                version INTEGER NOT NULL DEFAULT 0,
                 
                 FOREIGN KEY (vendor_id) REFERENCES vendors(id) ON DELETE SET NULL,
                 FOREIGN KEY (vendor_contact_id) REFERENCES vendor_contacts(id) ON DELETE SET NULL,
@@ -142,6 +258,11 @@ def init_database():
             )
         """)
         
+        # Row version bumped by every SCAR UPDATE; files from before it get the column added
+        cursor.execute("PRAGMA table_info(scars)")
+        if 'version' not in {col['name'] for col in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE scars ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        
         # Create activity log table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS scar_activity (
@@ -156,10 +277,34 @@ def init_database():
             )
         """)
         
+        # SCAR rows with their vendor and contact names, shared by the detail and list queries
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS scars_with_vendor AS
+            SELECT s.*, v.name as vendor_name, vc.name as contact_name, vc.email as contact_email
+            FROM scars s
+            LEFT JOIN vendors v ON s.vendor_id = v.id
+            LEFT JOIN vendor_contacts vc ON s.vendor_contact_id = vc.id
+        """)
+        
+        # Create indexes for the dashboard, list and activity queries
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scars_status ON scars(status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scars_vendor_status ON scars(vendor_id, status)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scars_due ON scars(response_due_date) WHERE status IN ('new', 'open')"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scars_created ON scars(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_scars_vendor_created ON scars(vendor_id, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_scar ON scar_activity(scar_id, created_at DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)")
+        
         # Check if data already exists
-        cursor.execute("SELECT COUNT(*) FROM vendors")
-        if cursor.fetchone()[0] == 0:
+        cursor.execute("SELECT COUNT(*) AS n FROM vendors")
+        if cursor.fetchone()['n'] == 0:
             seed_database(cursor)
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    _initialized = True
 
 def seed_database(cursor):
     """Seed database with initial data"""
@@ -204,14 +349,18 @@ def seed_database(cursor):
     )
     
     # Create sample SCARs
-    today = datetime.now()
+    today = date.today()
+    
+    def days_from_today(days: int) -> str:
+        return (today + timedelta(days=days)).isoformat()
+    
     scars = [
         {
             "id": str(uuid.uuid4()),
             "scar_number": "SCAR-2026-001",
             "status": "open",
-            "date_issued": (today - timedelta(days=5)).strftime("%Y-%m-%d"),
-            "response_due_date": (today + timedelta(days=10)).strftime("%Y-%m-%d"),
+            "date_issued": days_from_today(-5),
+            "response_due_date": days_from_today(10),
             "vendor_id": vendors[0][0],
             "vendor_contact_id": contacts[0][0],
             "ncr_number": "NCR-2026-0042",
@@ -229,8 +378,8 @@ def seed_database(cursor):
             "id": str(uuid.uuid4()),
             "scar_number": "SCAR-2026-002",
             "status": "submitted",
-            "date_issued": (today - timedelta(days=15)).strftime("%Y-%m-%d"),
-            "response_due_date": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+            "date_issued": days_from_today(-15),
+            "response_due_date": days_from_today(-1),
             "vendor_id": vendors[1][0],
             "vendor_contact_id": contacts[2][0],
             "ncr_number": "NCR-2026-0038",
@@ -245,25 +394,25 @@ def seed_database(cursor):
             "containment_isolate": "All affected boxes isolated in Warehouse B, Section 3.",
             "containment_screen_sort": "100% visual inspection completed. 127 boxes with visible discoloration separated.",
             "containment_prepared_by": "Mike Wilson",
-            "containment_date": (today - timedelta(days=10)).strftime("%Y-%m-%d"),
+            "containment_date": days_from_today(-10),
             "root_cause": "1. Why yellow tint? Ink formulation variance.\n2. Why variance? Supplier changed pigment source.\n3. Why changed? Cost reduction initiative.\n4. Why not communicated? Process gap in change management.\n5. Why gap? No formal change notification procedure.",
             "root_cause_evidence": "Lab analysis confirmed different pigment composition. Supplier documentation shows vendor change on 2026-01-15.",
             "root_cause_approved_by": "Quality Manager - Western Pkg",
-            "root_cause_date": (today - timedelta(days=8)).strftime("%Y-%m-%d"),
+            "root_cause_date": days_from_today(-8),
             "corrective_action": "Reverted to original pigment supplier. Implemented incoming inspection for color consistency.",
             "correction_approved_by": "Mike Wilson",
-            "correction_date": (today - timedelta(days=5)).strftime("%Y-%m-%d"),
+            "correction_date": days_from_today(-5),
             "preventive_action": "1. Established formal change notification procedure with 30-day advance notice requirement.\n2. Added color consistency check to incoming QC protocol.\n3. Quarterly supplier audits now include raw material sourcing review.",
             "prevention_approved_by": "Quality Manager - Western Pkg",
-            "prevention_date": (today - timedelta(days=3)).strftime("%Y-%m-%d"),
+            "prevention_date": days_from_today(-3),
             "created_by": admin_id,
         },
         {
             "id": str(uuid.uuid4()),
             "scar_number": "SCAR-2026-003",
             "status": "closed",
-            "date_issued": (today - timedelta(days=30)).strftime("%Y-%m-%d"),
-            "response_due_date": (today - timedelta(days=16)).strftime("%Y-%m-%d"),
+            "date_issued": days_from_today(-30),
+            "response_due_date": days_from_today(-16),
             "vendor_id": vendors[2][0],
             "vendor_contact_id": contacts[3][0],
             "ncr_number": "NCR-2026-0029",
@@ -278,77 +427,127 @@ def seed_database(cursor):
             "containment_isolate": "Entire lot quarantined. Customer shipments halted pending investigation.",
             "containment_screen_sort": "Functional testing on 250 sample units. 23% failure rate confirmed.",
             "containment_prepared_by": "Emily Chen",
-            "containment_date": (today - timedelta(days=28)).strftime("%Y-%m-%d"),
+            "containment_date": days_from_today(-28),
             "root_cause": "1. Why mechanism fails? Locking tab height insufficient.\n2. Why insufficient? Mold wear detected.\n3. Why wear not caught? Maintenance schedule overdue.\n4. Why overdue? Resource constraints.\n5. Why constraints? Inadequate maintenance staffing.",
             "root_cause_evidence": "Mold inspection photos showing 0.3mm wear on locking tab cavity. Maintenance logs show 45-day overdue status.",
             "root_cause_approved_by": "Emily Chen - Quality Director",
-            "root_cause_date": (today - timedelta(days=25)).strftime("%Y-%m-%d"),
+            "root_cause_date": days_from_today(-25),
             "corrective_action": "Mold refurbished and recertified. Added dedicated maintenance technician to CR cap production line.",
             "correction_approved_by": "Plant Manager - MVP",
-            "correction_date": (today - timedelta(days=22)).strftime("%Y-%m-%d"),
+            "correction_date": days_from_today(-22),
             "preventive_action": "1. Implemented predictive maintenance program with shot-count triggers.\n2. Weekly dimensional checks on all CR components.\n3. Hired additional maintenance staff.\n4. Created maintenance dashboard for real-time monitoring.",
             "prevention_approved_by": "Emily Chen - Quality Director",
-            "prevention_date": (today - timedelta(days=20)).strftime("%Y-%m-%d"),
+            "prevention_date": days_from_today(-20),
             "verification_acceptable": "yes",
             "effectiveness_check": "Follow-up audit completed. New maintenance program operational. 3 production runs passed all CR testing requirements.",
             "verified_by": "Calyx QA Team",
-            "verification_date": (today - timedelta(days=5)).strftime("%Y-%m-%d"),
+            "verification_date": days_from_today(-5),
             "created_by": admin_id,
         },
     ]
     
-    for scar in scars:
-        columns = ", ".join(scar.keys())
-        placeholders = ", ".join(["?" for _ in scar])
-        cursor.execute(
-            f"INSERT INTO scars ({columns}) VALUES ({placeholders})",
-            list(scar.values())
-        )
+    cursor.executemany(
+        f"INSERT INTO scars ({', '.join(SCAR_COLUMNS)}) VALUES ({', '.join('?' * len(SCAR_COLUMNS))})",
+        [tuple(scar.get(c) for c in SCAR_COLUMNS) for scar in scars]
+    )
+
+# =============================================================================
+# Lookup Cache
+# =============================================================================
+
+# Short-lived per-process cache for user and vendor rows fetched by id
+CACHE_TTL_SECONDS = 30
+_MISS = object()
+_user_cache = {}
+_vendor_cache = {}
+
+def _cache_get(cache: dict, key: str):
+    """Return a copy of a live cached value, or _MISS"""
+    entry = cache.get(key)
+    if entry is None or entry[1] < time.monotonic():
+        return _MISS
+    value = entry[0]
+    return dict(value) if value else value
+
+def _cache_put(cache: dict, key: str, value):
+    """Store a value with the cache TTL"""
+    cache[key] = (value, time.monotonic() + CACHE_TTL_SECONDS)
+
+def clear_caches(*groups: str):
+    """Clear the cached list/count reads for the given groups"""
+    for group in groups:
+        for func in _CACHED_READS[group]:
+            func.clear()
+
+def _invalidates(*groups: str):
+    """Clear the given cache groups after the decorated write returns"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            clear_caches(*groups)
+            return result
+        return wrapper
+    return decorator
 
 # =============================================================================
 # User Operations
 # =============================================================================
 
+# Hot lookups kept as constants so the per-connection statement cache hits
+_SQL_USER_BY_EMAIL = """
+    SELECT u.*, v.name as vendor_name 
+    FROM users u 
+    LEFT JOIN vendors v ON u.vendor_id = v.id 
+    WHERE u.email = ?
+"""
+
+_SQL_USER_BY_ID = """
+    SELECT u.*, v.name as vendor_name 
+    FROM users u 
+    LEFT JOIN vendors v ON u.vendor_id = v.id 
+    WHERE u.id = ?
+"""
+
 def get_user_by_email(email: str) -> dict | None:
     """Get user by email"""
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT u.*, v.name as vendor_name 
-            FROM users u 
-            LEFT JOIN vendors v ON u.vendor_id = v.id 
-            WHERE u.email = ?
-        """, (email,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        cursor.execute(_SQL_USER_BY_EMAIL, (email,))
+        return cursor.fetchone()
 
 def get_user_by_id(user_id: str) -> dict | None:
     """Get user by ID"""
+    hit = _cache_get(_user_cache, user_id)
+    if hit is not _MISS:
+        return hit
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT u.*, v.name as vendor_name 
-            FROM users u 
-            LEFT JOIN vendors v ON u.vendor_id = v.id 
-            WHERE u.id = ?
-        """, (user_id,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        cursor.execute(_SQL_USER_BY_ID, (user_id,))
+        user = cursor.fetchone()
+    _cache_put(_user_cache, user_id, user)
+    return dict(user) if user else None
 
+@_invalidates("users")
 def create_user(email: str, password: str, name: str, role: str, vendor_id: str = None) -> dict:
     """Create a new user"""
-    user_id = str(uuid.uuid4())
     status = "approved" if role == "admin" else "pending"
     
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO users (id, email, password, name, role, vendor_id, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (user_id, email, get_password_hash(password), name, role, vendor_id, status)
+            f"INSERT INTO users (id, email, password, name, role, vendor_id, status) VALUES ({_NEW_ID}, ?, ?, ?, ?, ?, ?) RETURNING *",
+            (email, get_password_hash(password), name, role, vendor_id, status)
         )
-    
-    return get_user_by_id(user_id)
+        user = cursor.fetchone()
+        user['vendor_name'] = None
+        if vendor_id:
+            cursor.execute("SELECT name FROM vendors WHERE id = ?", (vendor_id,))
+            row = cursor.fetchone()
+            user['vendor_name'] = row['name'] if row else None
+        return user
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_all_users() -> list:
     """Get all users with vendor info"""
     with get_db() as conn:
@@ -359,25 +558,27 @@ def get_all_users() -> list:
             LEFT JOIN vendors v ON u.vendor_id = v.id 
             ORDER BY u.created_at DESC
         """)
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
+
+_USER_UPDATE_FIELDS = ('name', 'email', 'role', 'vendor_id', 'status')
+_SQL_UPDATE_USER = _flagged_update("users", _USER_UPDATE_FIELDS)
 
+@_invalidates("users")
 def update_user(user_id: str, **kwargs) -> dict:
     """Update user fields"""
-    allowed_fields = ['name', 'email', 'role', 'vendor_id', 'status']
-    updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
+    updates = {k: v for k, v in kwargs.items() if k in _USER_UPDATE_FIELDS}
     
     if not updates:
         return get_user_by_id(user_id)
     
-    set_clause = ", ".join([f"{k} = ?" for k in updates.keys()])
-    values = list(updates.values()) + [user_id]
-    
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute(f"UPDATE users SET {set_clause} WHERE id = ?", values)
+        cursor.execute(_SQL_UPDATE_USER, _flagged_params(_USER_UPDATE_FIELDS, updates, user_id))
+    _user_cache.pop(user_id, None)
     
     return get_user_by_id(user_id)
 
+@_invalidates("users")
 def update_user_password(user_id: str, new_password: str):
     """Update user password"""
     with get_db() as conn:
@@ -386,73 +587,115 @@ def update_user_password(user_id: str, new_password: str):
             "UPDATE users SET password = ? WHERE id = ?",
             (get_password_hash(new_password), user_id)
         )
+    _user_cache.pop(user_id, None)
 
+@_invalidates("users")
 def delete_user(user_id: str):
     """Delete a user"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    _user_cache.pop(user_id, None)
 
 def get_pending_users_count() -> int:
     """Get count of pending user approvals"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users WHERE status = 'pending'")
-        return cursor.fetchone()[0]
+    # Counted from the cached user list so the badge and settings page share one entry
+    return sum(1 for u in get_all_users() if u['status'] == 'pending')
 
 # =============================================================================
 # Vendor Operations
 # =============================================================================
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_all_vendors() -> list:
     """Get all vendors"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM vendors ORDER BY name")
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_all_vendors_with_contacts() -> list:
+    """Get all vendors, each with its contacts under 'contacts', in one query"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT v.*, c.id AS contact_id, c.name AS contact_name, c.email AS contact_email,
+                   c.phone AS contact_phone, c.is_primary AS contact_is_primary
+            FROM vendors v
+            LEFT JOIN vendor_contacts c ON c.vendor_id = v.id
+            ORDER BY v.name, c.is_primary DESC, c.name
+        """)
+        vendors = {}
+        for row in cursor:
+            vendor = vendors.get(row['id'])
+            if vendor is None:
+                vendor = vendors[row['id']] = {k: v for k, v in row.items() if not k.startswith('contact_')}
+                vendor['contacts'] = []
+            if row['contact_id'] is not None:
+                vendor['contacts'].append({
+                    'id': row['contact_id'],
+                    'vendor_id': row['id'],
+                    'name': row['contact_name'],
+                    'email': row['contact_email'],
+                    'phone': row['contact_phone'],
+                    'is_primary': row['contact_is_primary'],
+                })
+        return list(vendors.values())
 
 def get_vendor_by_id(vendor_id: str) -> dict | None:
     """Get vendor by ID"""
+    hit = _cache_get(_vendor_cache, vendor_id)
+    if hit is not _MISS:
+        return hit
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM vendors WHERE id = ?", (vendor_id,))
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        vendor = cursor.fetchone()
+    _cache_put(_vendor_cache, vendor_id, vendor)
+    return dict(vendor) if vendor else None
 
+@_invalidates("vendors")
 def create_vendor(name: str, address: str = None, phone: str = None) -> dict:
     """Create a new vendor"""
-    vendor_id = str(uuid.uuid4())
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO vendors (id, name, address, phone) VALUES (?, ?, ?, ?)",
-            (vendor_id, name, address, phone)
+            f"INSERT INTO vendors (id, name, address, phone) VALUES ({_NEW_ID}, ?, ?, ?) RETURNING *",
+            (name, address, phone)
         )
-    return get_vendor_by_id(vendor_id)
+        return cursor.fetchone()
 
+_VENDOR_UPDATE_FIELDS = ('name', 'address', 'phone')
+_SQL_UPDATE_VENDOR = _flagged_update("vendors", _VENDOR_UPDATE_FIELDS)
+
+@_invalidates("vendors", "users", "scars")
 def update_vendor(vendor_id: str, **kwargs) -> dict:
     """Update vendor fields"""
-    allowed_fields = ['name', 'address', 'phone']
-    updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
+    updates = {k: v for k, v in kwargs.items() if k in _VENDOR_UPDATE_FIELDS}
     
     if not updates:
         return get_vendor_by_id(vendor_id)
     
-    set_clause = ", ".join([f"{k} = ?" for k in updates.keys()])
-    values = list(updates.values()) + [vendor_id]
-    
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute(f"UPDATE vendors SET {set_clause} WHERE id = ?", values)
+        cursor.execute(_SQL_UPDATE_VENDOR, _flagged_params(_VENDOR_UPDATE_FIELDS, updates, vendor_id))
+    _vendor_cache.pop(vendor_id, None)
+    # Cached users carry the vendor name
+    _user_cache.clear()
     
     return get_vendor_by_id(vendor_id)
 
+@_invalidates("vendors", "users", "contacts", "scars")
 def delete_vendor(vendor_id: str):
     """Delete a vendor"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM vendors WHERE id = ?", (vendor_id,))
+    _vendor_cache.pop(vendor_id, None)
+    _user_cache.clear()
 
+@st.cache_data(ttl=60, show_spinner=False)
 def get_vendor_contacts(vendor_id: str) -> list:
     """Get all contacts for a vendor"""
     with get_db() as conn:
@@ -461,24 +704,26 @@ def get_vendor_contacts(vendor_id: str) -> list:
             "SELECT * FROM vendor_contacts WHERE vendor_id = ? ORDER BY is_primary DESC, name",
             (vendor_id,)
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
 
+@_invalidates("contacts")
 def create_vendor_contact(vendor_id: str, name: str, email: str, phone: str = None, is_primary: bool = False) -> dict:
     """Create a vendor contact"""
-    contact_id = str(uuid.uuid4())
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO vendor_contacts (id, vendor_id, name, email, phone, is_primary) VALUES (?, ?, ?, ?, ?, ?)",
-            (contact_id, vendor_id, name, email, phone, 1 if is_primary else 0)
+            f"INSERT INTO vendor_contacts (id, vendor_id, name, email, phone, is_primary) VALUES ({_NEW_ID}, ?, ?, ?, ?, ?) RETURNING *",
+            (vendor_id, name, email, phone, 1 if is_primary else 0)
         )
-        cursor.execute("SELECT * FROM vendor_contacts WHERE id = ?", (contact_id,))
-        return dict(cursor.fetchone())
+        return cursor.fetchone()
+
+_CONTACT_UPDATE_FIELDS = ('name', 'email', 'phone', 'is_primary')
+_SQL_UPDATE_CONTACT = _flagged_update("vendor_contacts", _CONTACT_UPDATE_FIELDS)
 
+@_invalidates("contacts")
 def update_vendor_contact(contact_id: str, **kwargs) -> dict:
     """Update vendor contact"""
-    allowed_fields = ['name', 'email', 'phone', 'is_primary']
-    updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
+    updates = {k: v for k, v in kwargs.items() if k in _CONTACT_UPDATE_FIELDS}
     
     if 'is_primary' in updates:
         updates['is_primary'] = 1 if updates['is_primary'] else 0
@@ -486,15 +731,13 @@ def update_vendor_contact(contact_id: str, **kwargs) -> dict:
     if not updates:
         return None
     
-    set_clause = ", ".join([f"{k} = ?" for k in updates.keys()])
-    values = list(updates.values()) + [contact_id]
-    
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute(f"UPDATE vendor_contacts SET {set_clause} WHERE id = ?", values)
+        cursor.execute(_SQL_UPDATE_CONTACT, _flagged_params(_CONTACT_UPDATE_FIELDS, updates, contact_id))
         cursor.execute("SELECT * FROM vendor_contacts WHERE id = ?", (contact_id,))
-        return dict(cursor.fetchone())
+        return cursor.fetchone()
 
+@_invalidates("contacts")
 def delete_vendor_contact(contact_id: str):
     """Delete a vendor contact"""
     with get_db() as conn:
@@ -505,127 +748,190 @@ def delete_vendor_contact(contact_id: str):
 # SCAR Operations
 # =============================================================================
 
+_SQL_LOG_ACTIVITY = (
+    f"INSERT INTO scar_activity (id, scar_id, user_id, action, details) VALUES ({_NEW_ID}, ?, ?, ?, ?)"
+)
+
+_SQL_SCAR_BY_ID = "SELECT * FROM scars_with_vendor WHERE id = ?"
+
+def _next_scar_number(conn) -> str:
+    """Generate next SCAR number on an open connection"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT y.year AS year, (
+            SELECT COALESCE(MAX(CAST(substr(scar_number, 11) AS INTEGER)), 0) FROM scars
+            WHERE scar_number LIKE 'SCAR-' || y.year || '-%'
+        ) AS last_num
+        FROM (SELECT strftime('%Y', 'now', 'localtime') AS year) y
+    """)
+    row = cursor.fetchone()
+    return f"SCAR-{row['year']}-{row['last_num'] + 1:03d}"
+
 def get_next_scar_number() -> str:
     """Generate next SCAR number"""
-    year = datetime.now().year
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT scar_number FROM scars WHERE scar_number LIKE ? ORDER BY scar_number DESC LIMIT 1",
-            (f"SCAR-{year}-%",)
-        )
-        row = cursor.fetchone()
-        if row:
-            last_num = int(row[0].split("-")[-1])
-            return f"SCAR-{year}-{last_num + 1:03d}"
-        return f"SCAR-{year}-001"
+        return _next_scar_number(conn)
 
+@_invalidates("scars")
 def create_scar(data: dict, created_by: str) -> dict:
     """Create a new SCAR"""
-    scar_id = str(uuid.uuid4())
-    scar_number = get_next_scar_number()
-    
-    data['id'] = scar_id
-    data['scar_number'] = scar_number
+    data.pop('id', None)
     data['status'] = 'open'
     data['created_by'] = created_by
-    data['created_at'] = datetime.now().isoformat()
-    data['updated_at'] = datetime.now().isoformat()
-    
-    columns = ", ".join(data.keys())
-    placeholders = ", ".join(["?" for _ in data])
+    data.pop('created_at', None)
+    data.pop('updated_at', None)
+    data.pop('version', None)
     
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute(f"INSERT INTO scars ({columns}) VALUES ({placeholders})", list(data.values()))
+        # Number, insert, log and re-read in one transaction
+        scar_number = data['scar_number'] = _next_scar_number(conn)
+        columns = ", ".join(data.keys())
+        placeholders = ", ".join(["?" for _ in data])
         
-        # Log activity
+        cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO scar_activity (id, scar_id, user_id, action, details) VALUES (?, ?, ?, ?, ?)",
-            (str(uuid.uuid4()), scar_id, created_by, "created", f"SCAR {scar_number} created")
+            f"INSERT INTO scars (id, {columns}) VALUES ({_NEW_ID}, {placeholders}) RETURNING id",
+            list(data.values())
         )
-    
-    return get_scar_by_id(scar_id)
+        scar_id = cursor.fetchone()['id']
+        
+        # Log activity
+        cursor.execute(_SQL_LOG_ACTIVITY, (scar_id, created_by, "created", f"SCAR {scar_number} created"))
+        
+        return _get_scar_by_id(conn, scar_id)
+
+def _get_scar_by_id(conn, scar_id: str) -> dict | None:
+    """Get SCAR by ID with vendor info on an open connection"""
+    cursor = conn.cursor()
+    cursor.execute(_SQL_SCAR_BY_ID, (scar_id,))
+    return cursor.fetchone()
 
 def get_scar_by_id(scar_id: str) -> dict | None:
     """Get SCAR by ID with vendor info"""
+    with get_db() as conn:
+        return _get_scar_by_id(conn, scar_id)
+
+def get_scar_version(scar_id: str) -> int | None:
+    """Get only a SCAR's row version, for cheap staleness checks"""
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT s.*, v.name as vendor_name, vc.name as contact_name, vc.email as contact_email
-            FROM scars s
-            LEFT JOIN vendors v ON s.vendor_id = v.id
-            LEFT JOIN vendor_contacts vc ON s.vendor_contact_id = vc.id
-            WHERE s.id = ?
-        """, (scar_id,))
+        cursor.execute("SELECT version FROM scars WHERE id = ?", (scar_id,))
         row = cursor.fetchone()
-        return dict(row) if row else None
+        return row['version'] if row else None
 
+# Columns the list views render; the long free-text sections stay in the detail query
+_SCAR_LIST_COLUMNS = (
+    "id, scar_number, status, date_issued, response_due_date, vendor_id, "
+    "product_name, defect_type, severity, created_at, updated_at, vendor_name"
+)
+
+@st.cache_data(ttl=60, show_spinner=False)
 def get_all_scars(vendor_id: str = None, status: str = None) -> list:
     """Get all SCARs, optionally filtered by vendor and/or status"""
+    return list(get_all_scars_iter(vendor_id, status))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_recent_scars(vendor_id: str = None, limit: int = 5) -> list:
+    """Get the newest SCARs, optionally for one vendor"""
+    return list(get_all_scars_iter(vendor_id, limit=limit))
+
+def get_all_scars_iter(vendor_id: str = None, status: str = None, limit: int = None):
+    """Yield SCARs lazily, newest first, optionally filtered by vendor and/or status"""
     with get_db() as conn:
         cursor = conn.cursor()
-        query = """
-            SELECT s.*, v.name as vendor_name, vc.name as contact_name, vc.email as contact_email
-            FROM scars s
-            LEFT JOIN vendors v ON s.vendor_id = v.id
-            LEFT JOIN vendor_contacts vc ON s.vendor_contact_id = vc.id
+        query = f"""
+            SELECT {_SCAR_LIST_COLUMNS}
+            FROM scars_with_vendor
             WHERE 1=1
         """
         params = []
         
         if vendor_id:
-            query += " AND s.vendor_id = ?"
+            query += " AND vendor_id = ?"
             params.append(vendor_id)
         
         if status:
-            query += " AND s.status = ?"
+            query += " AND status = ?"
             params.append(status)
         
-        query += " ORDER BY s.created_at DESC"
+        query += " ORDER BY created_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
         
         cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        for row in cursor:
+            yield row
+
+_SCAR_UPDATE_FIELDS = tuple(c for c in SCAR_COLUMNS if c not in ('id', 'scar_number', 'created_by'))
+_SQL_UPDATE_SCAR = _flagged_update("scars", _SCAR_UPDATE_FIELDS, ", updated_at = CURRENT_TIMESTAMP, version = version + 1")
 
+@st.cache_data(ttl=60, show_spinner=False)
+def get_scars(vendor_id: str = None, status: str = None, search: str = None,
+              limit: int = 50, offset: int = 0) -> tuple[list, int]:
+    """Get one page of SCARs matching the filters, plus the total match count"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        query = f"""
+            SELECT {_SCAR_LIST_COLUMNS}, COUNT(*) OVER () AS total_count
+            FROM scars_with_vendor
+            WHERE 1=1
+        """
+        params = []
+        
+        if vendor_id:
+            query += " AND vendor_id = ?"
+            params.append(vendor_id)
+        
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        
+        if search:
+            query += """
+                AND (scar_number LIKE ? ESCAPE '\\' OR product_name LIKE ? ESCAPE '\\'
+                     OR vendor_name LIKE ? ESCAPE '\\' OR defect_type LIKE ? ESCAPE '\\')
+            """
+            # Literal substring match: the search text's own \, % and _ are not wildcards
+            pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params += [f"%{pattern}%"] * 4
+        
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        total = rows[0]['total_count'] if rows else 0
+        for row in rows:
+            del row['total_count']
+        return rows, total
+
+@_invalidates("scars")
 def update_scar(scar_id: str, data: dict, user_id: str = None) -> dict:
     """Update SCAR fields"""
-    data['updated_at'] = datetime.now().isoformat()
-    
-    # Remove fields that shouldn't be updated
-    data.pop('id', None)
-    data.pop('scar_number', None)
-    data.pop('created_by', None)
-    data.pop('created_at', None)
-    
-    set_clause = ", ".join([f"{k} = ?" for k in data.keys()])
-    values = list(data.values()) + [scar_id]
-    
+    # Fields that shouldn't be updated are simply not in _SCAR_UPDATE_FIELDS
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute(f"UPDATE scars SET {set_clause} WHERE id = ?", values)
+        cursor.execute(_SQL_UPDATE_SCAR, _flagged_params(_SCAR_UPDATE_FIELDS, data, scar_id))
         
         if user_id:
-            cursor.execute(
-                "INSERT INTO scar_activity (id, scar_id, user_id, action, details) VALUES (?, ?, ?, ?, ?)",
-                (str(uuid.uuid4()), scar_id, user_id, "updated", "SCAR updated")
-            )
-    
-    return get_scar_by_id(scar_id)
+            cursor.execute(_SQL_LOG_ACTIVITY, (scar_id, user_id, "updated", "SCAR updated"))
+        
+        return _get_scar_by_id(conn, scar_id)
 
+@_invalidates("scars")
 def submit_scar(scar_id: str, user_id: str) -> dict:
     """Submit SCAR response (supplier action)"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "UPDATE scars SET status = 'submitted', updated_at = ? WHERE id = ?",
-            (datetime.now().isoformat(), scar_id)
-        )
-        cursor.execute(
-            "INSERT INTO scar_activity (id, scar_id, user_id, action, details) VALUES (?, ?, ?, ?, ?)",
-            (str(uuid.uuid4()), scar_id, user_id, "submitted", "Supplier response submitted")
+            "UPDATE scars SET status = 'submitted', updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?",
+            (scar_id,)
         )
-    return get_scar_by_id(scar_id)
+        cursor.execute(_SQL_LOG_ACTIVITY, (scar_id, user_id, "submitted", "Supplier response submitted"))
+        return _get_scar_by_id(conn, scar_id)
 
+@_invalidates("scars")
 def verify_scar(scar_id: str, user_id: str, acceptable: bool, reopen: bool = False) -> dict:
     """Verify SCAR (admin action)"""
     new_status = "open" if reopen else ("closed" if acceptable else "open")
@@ -633,20 +939,17 @@ def verify_scar(scar_id: str, user_id: str, acceptable: bool, reopen: bool = Fal
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "UPDATE scars SET status = ?, updated_at = ? WHERE id = ?",
-            (new_status, datetime.now().isoformat(), scar_id)
+            "UPDATE scars SET status = ?, updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ?",
+            (new_status, scar_id)
         )
         
         action = "reopened" if reopen else ("closed" if acceptable else "returned")
         details = "SCAR reopened for revision" if reopen else (
             "SCAR verified and closed" if acceptable else "SCAR returned to supplier for revision"
         )
-        cursor.execute(
-            "INSERT INTO scar_activity (id, scar_id, user_id, action, details) VALUES (?, ?, ?, ?, ?)",
-            (str(uuid.uuid4()), scar_id, user_id, action, details)
-        )
-    
-    return get_scar_by_id(scar_id)
+        cursor.execute(_SQL_LOG_ACTIVITY, (scar_id, user_id, action, details))
+        
+        return _get_scar_by_id(conn, scar_id)
 
 def get_scar_activity(scar_id: str) -> list:
     """Get activity log for a SCAR"""
@@ -659,36 +962,52 @@ def get_scar_activity(scar_id: str) -> list:
             WHERE a.scar_id = ?
             ORDER BY a.created_at DESC
         """, (scar_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        return cursor.fetchall()
 
 def get_scar_stats(vendor_id: str = None) -> dict:
     """Get SCAR statistics"""
+    return _scar_stats(vendor_id or None, date.today().isoformat())
+
+# Stats queries with and without the vendor filter, so each gets its own
+# plan and the vendor variants can use idx_scars_vendor_status
+_SQL_STATUS_COUNTS = "SELECT status, COUNT(*) AS n FROM scars GROUP BY status"
+_SQL_VENDOR_STATUS_COUNTS = "SELECT status, COUNT(*) AS n FROM scars WHERE vendor_id = ? GROUP BY status"
+_SQL_OVERDUE_COUNT = (
+    "SELECT COUNT(*) AS n FROM scars WHERE status IN ('new', 'open') AND response_due_date < ?"
+)
+_SQL_VENDOR_OVERDUE_COUNT = (
+    "SELECT COUNT(*) AS n FROM scars WHERE vendor_id = ? "
+    "AND status IN ('new', 'open') AND response_due_date < ?"
+)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _scar_stats(vendor_id: str | None, today: str) -> dict:
+    """SCAR statistics for one vendor (or all) as of the given local day"""
+    if vendor_id:
+        status_sql, overdue_sql, params = _SQL_VENDOR_STATUS_COUNTS, _SQL_VENDOR_OVERDUE_COUNT, (vendor_id,)
+    else:
+        status_sql, overdue_sql, params = _SQL_STATUS_COUNTS, _SQL_OVERDUE_COUNT, ()
+    
     with get_db() as conn:
         cursor = conn.cursor()
         
-        base_query = "SELECT COUNT(*) FROM scars WHERE 1=1"
-        params = []
-        
-        if vendor_id:
-            base_query += " AND vendor_id = ?"
-            params = [vendor_id]
-        
-        # Total
-        cursor.execute(base_query, params)
-        total = cursor.fetchone()[0]
-        
         # By status
-        stats = {"total": total}
+        cursor.execute(status_sql, params)
+        counts = {row['status']: row['n'] for row in cursor.fetchall()}
+        stats = {"total": sum(counts.values())}
         for status in ['new', 'open', 'submitted', 'closed']:
-            cursor.execute(base_query + " AND status = ?", params + [status])
-            stats[status] = cursor.fetchone()[0]
+            stats[status] = counts.get(status, 0)
         
         # Overdue
-        today = datetime.now().strftime("%Y-%m-%d")
-        cursor.execute(
-            base_query + " AND status IN ('new', 'open') AND response_due_date < ?",
-            params + [today]
-        )
-        stats['overdue'] = cursor.fetchone()[0]
+        cursor.execute(overdue_sql, (*params, today))
+        stats['overdue'] = cursor.fetchone()['n']
         
         return stats
+
+# Cached reads cleared by each write group; see _invalidates
+_CACHED_READS = {
+    "users": (get_all_users,),
+    "vendors": (get_all_vendors, get_all_vendors_with_contacts),
+    "contacts": (get_vendor_contacts, get_all_vendors_with_contacts),
+    "scars": (get_all_scars, get_recent_scars, get_scars, _scar_stats),
+}
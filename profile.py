@@ -5,6 +5,43 @@ Profile Page - User profile and password management
 import streamlit as st
 from database import update_user_password, verify_password, get_user_by_id
 
+_CARD_OPEN = '<div style="background: white; padding: 1.5rem; border-radius: 10px; border: 1px solid #E5E7EB;">'
+
+_ADMIN_ORG_HTML = f"""
+            {_CARD_OPEN}
+                <h4 style="margin: 0 0 1rem 0; color: #374151;">Organization</h4>
+                <p style="margin: 0.5rem 0; color: #6B7280;">Calyx Containers (Admin)</p>
+            </div>
+            """
+
+_UNASSIGNED_ORG_HTML = f"""
+            {_CARD_OPEN}
+                <h4 style="margin: 0 0 1rem 0; color: #374151;">Organization</h4>
+                <p style="margin: 0.5rem 0; color: #6B7280;">Not assigned to a vendor</p>
+            </div>
+            """
+
+def _render_user_card(name, email, role_label, status):
+    """Personal details card HTML"""
+    return f"""
+        {_CARD_OPEN}
+            <h4 style="margin: 0 0 1rem 0; color: #374151;">Personal Details</h4>
+            <p style="margin: 0.5rem 0;"><strong>Name:</strong> {name}</p>
+            <p style="margin: 0.5rem 0;"><strong>Email:</strong> {email}</p>
+            <p style="margin: 0.5rem 0;"><strong>Role:</strong> {role_label}</p>
+            <p style="margin: 0.5rem 0;"><strong>Status:</strong> <span class="badge badge-{status}">{status.upper()}</span></p>
+        </div>
+        """
+
+def _render_vendor_card(vendor_name):
+    """Organization card HTML for a supplier's vendor"""
+    return f"""
+            {_CARD_OPEN}
+                <h4 style="margin: 0 0 1rem 0; color: #374151;">Organization</h4>
+                <p style="margin: 0.5rem 0;"><strong>Vendor:</strong> {vendor_name}</p>
+            </div>
+            """
+
 def show():
     """Display profile page"""
     user = st.session_state.user
@@ -20,31 +57,20 @@ def show():
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown(f"""
-        <div style="background: white; padding: 1.5rem; border-radius: 10px; border: 1px solid #E5E7EB;">
-            <h4 style="margin: 0 0 1rem 0; color: #374151;">Personal Details</h4>
-            <p style="margin: 0.5rem 0;"><strong>Name:</strong> {user['name']}</p>
-            <p style="margin: 0.5rem 0;"><strong>Email:</strong> {user['email']}</p>
-            <p style="margin: 0.5rem 0;"><strong>Role:</strong> {'Administrator' if user['role'] == 'admin' else 'Supplier'}</p>
-            <p style="margin: 0.5rem 0;"><strong>Status:</strong> <span class="badge badge-{user['status']}">{user['status'].upper()}</span></p>
-        </div>
-        """, unsafe_allow_html=True)
+        role_label = 'Administrator' if user['role'] == 'admin' else 'Supplier'
+        st.markdown(
+            _render_user_card(user['name'], user['email'], role_label, user['status']),
+            unsafe_allow_html=True
+        )
     
     with col2:
         if user['role'] == 'supplier' and user.get('vendor_name'):
-            st.markdown(f"""
-            <div style="background: white; padding: 1.5rem; border-radius: 10px; border: 1px solid #E5E7EB;">
-                <h4 style="margin: 0 0 1rem 0; color: #374151;">Organization</h4>
-                <p style="margin: 0.5rem 0;"><strong>Vendor:</strong> {user.get('vendor_name', 'Not assigned')}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_render_vendor_card(user['vendor_name']), unsafe_allow_html=True)
         else:
-            st.markdown(f"""
-            <div style="background: white; padding: 1.5rem; border-radius: 10px; border: 1px solid #E5E7EB;">
-                <h4 style="margin: 0 0 1rem 0; color: #374151;">Organization</h4>
-                <p style="margin: 0.5rem 0; color: #6B7280;">{'Calyx Containers (Admin)' if user['role'] == 'admin' else 'Not assigned to a vendor'}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(
+                _ADMIN_ORG_HTML if user['role'] == 'admin' else _UNASSIGNED_ORG_HTML,
+                unsafe_allow_html=True
+            )
     
     st.markdown("---")
     
@@ -5,8 +5,7 @@ SCAR Create Page - Create new SCAR (admin only)
 import streamlit as st
 from datetime import datetime, timedelta
 from database import (
-    get_all_vendors,
-    get_vendor_contacts,
+    get_all_vendors_with_contacts,
     create_scar
 )
 
@@ -33,8 +32,11 @@ def show():
     
     st.markdown("---")
     
-    # Get vendors for dropdown
-    vendors = get_all_vendors()
+    # Get vendors and their contacts for the dropdowns in one cached read
+    vendors = get_all_vendors_with_contacts()
+    vendor_ids = [""] + [v['id'] for v in vendors]
+    vendor_names = {v['id']: v['name'] for v in vendors}
+    vendor_contacts = {v['id']: v['contacts'] for v in vendors}
     
     # Initialize form state
     if 'new_scar_vendor_id' not in st.session_state:
@@ -69,20 +71,19 @@ def show():
         with col2:
             vendor_id = st.selectbox(
                 "Supplier/Vendor *",
-                options=[""] + [v['id'] for v in vendors],
-                format_func=lambda x: "Select a vendor..." if x == "" else next((v['name'] for v in vendors if v['id'] == x), x),
+                options=vendor_ids,
+                format_func=lambda x: "Select a vendor..." if x == "" else vendor_names.get(x, x),
                 key="vendor_select"
             )
             
             # Get contacts for selected vendor
-            contacts = []
-            if vendor_id:
-                contacts = get_vendor_contacts(vendor_id)
+            contacts = vendor_contacts.get(vendor_id, [])
+            contact_labels = {c['id']: f"{c['name']} ({c['email']})" for c in contacts}
             
             vendor_contact_id = st.selectbox(
                 "Supplier Contact *",
                 options=[""] + [c['id'] for c in contacts],
-                format_func=lambda x: "Select a contact..." if x == "" else next((f"{c['name']} ({c['email']})" for c in contacts if c['id'] == x), x),
+                format_func=lambda x: "Select a contact..." if x == "" else contact_labels.get(x, x),
                 disabled=not vendor_id
             )
             
@@ -4,34 +4,62 @@ SCAR Detail Page - View and edit SCAR details
 
 import streamlit as st
 from datetime import datetime
+from functools import lru_cache
 from database import (
     get_scar_by_id, 
+    get_scar_version,
     update_scar, 
     submit_scar, 
     verify_scar,
     get_scar_activity
 )
 
+SCAR_SECTIONS = [
+    "📄 SCAR Details",
+    "⚠️ Non-Conformity",
+    "🛡️ 3. Containment",
+    "🔍 4. Root Cause",
+    "🔧 5. Correction",
+    "🛑 6. Prevention",
+    "✅ 7. Verification"
+]
+
+# Header badge markup for every status/severity the schema allows
+_BADGE = '<span class="badge badge-{0}" style="font-size: 0.9rem;">{1}</span>'
+STATUS_BADGES = {s: _BADGE.format(s, s.upper()) for s in ('new', 'open', 'submitted', 'closed')}
+SEVERITY_BADGES = {s: _BADGE.format(s, s.upper()) for s in ('minor', 'major', 'critical')}
+
+@lru_cache(maxsize=4096)
 def format_date(date_str):
     """Format date string for display"""
     if not date_str:
         return "N/A"
     try:
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        dt = datetime.fromisoformat(date_str[:-1] + '+00:00' if date_str.endswith('Z') else date_str)
         return dt.strftime("%b %d, %Y")
     except:
         return date_str
 
+@lru_cache(maxsize=4096)
 def format_datetime(date_str):
     """Format datetime string for display"""
     if not date_str:
         return "N/A"
     try:
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        dt = datetime.fromisoformat(date_str[:-1] + '+00:00' if date_str.endswith('Z') else date_str)
         return dt.strftime("%b %d, %Y at %I:%M %p")
     except:
         return date_str
 
+def load_scar(scar_id):
+    """Get the SCAR, reusing the session copy while its row version is unchanged"""
+    cached = st.session_state.get('scar_cache')
+    if cached and cached['id'] == scar_id and cached['version'] == get_scar_version(scar_id):
+        return cached
+    scar = get_scar_by_id(scar_id)
+    st.session_state.scar_cache = scar
+    return scar
+
 def show():
     """Display SCAR detail page"""
     user = st.session_state.user
@@ -45,7 +73,7 @@ def show():
             st.rerun()
         return
     
-    scar = get_scar_by_id(scar_id)
+    scar = load_scar(scar_id)
     if not scar:
         st.error("SCAR not found")
         if st.button("← Back to SCARs"):
@@ -80,8 +108,8 @@ def show():
     st.markdown(f"""
     <div style="display: flex; align-items: center; gap: 1rem; margin: 1rem 0;">
         <h1 style="margin: 0;">{scar['scar_number']}</h1>
-        <span class="badge badge-{scar['status']}" style="font-size: 0.9rem;">{scar['status'].upper()}</span>
-        {f'<span class="badge badge-{scar["severity"]}" style="font-size: 0.9rem;">{scar["severity"].upper()}</span>' if scar.get('severity') else ''}
+        {STATUS_BADGES[scar['status']]}
+        {SEVERITY_BADGES.get(scar.get('severity'), '')}
     </div>
     """, unsafe_allow_html=True)
     
@@ -97,16 +125,14 @@ def show():
         if not is_admin:
             st.warning(f"⏳ Please submit your response by {format_date(scar.get('response_due_date'))}")
     
-    # Create tabs for the form sections
-    tabs = st.tabs([
-        "📄 SCAR Details",
-        "⚠️ Non-Conformity", 
-        "🛡️ 3. Containment",
-        "🔍 4. Root Cause",
-        "🔧 5. Correction",
-        "🛑 6. Prevention",
-        "✅ 7. Verification"
-    ])
+    # Section selector; unlike st.tabs, only the chosen section is built
+    section = st.radio(
+        "Section",
+        SCAR_SECTIONS,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="scar_section"
+    )
     
     # Initialize form data in session state
     if 'scar_form_data' not in st.session_state or st.session_state.get('scar_form_id') != scar_id:
@@ -132,8 +158,8 @@ def show():
         }
         st.session_state.scar_form_id = scar_id
     
-    # Tab 1: SCAR Details (read-only)
-    with tabs[0]:
+    # Section 1: SCAR Details (read-only)
+    if section == SCAR_SECTIONS[0]:
         st.markdown("### Section 1: SCAR Details")
         
         col1, col2 = st.columns(2)
@@ -157,8 +183,8 @@ def show():
         with col3:
             st.text_input("Lot Number(s)", value=scar.get('lot_numbers') or '', disabled=True)
     
-    # Tab 2: Non-Conformity (read-only)
-    with tabs[1]:
+    # Section 2: Non-Conformity (read-only)
+    if section == SCAR_SECTIONS[1]:
         st.markdown("### Section 2: Non-Conformity Description")
         
         col1, col2 = st.columns(2)
@@ -175,8 +201,8 @@ def show():
         severity = scar.get('severity', '').capitalize() if scar.get('severity') else 'Not specified'
         st.text_input("Severity", value=severity, disabled=True)
     
-    # Tab 3: Containment (editable by supplier)
-    with tabs[2]:
+    # Section 3: Containment (editable by supplier)
+    if section == SCAR_SECTIONS[2]:
         st.markdown("### Section 3: Containment")
         st.caption("Describe immediate actions taken to contain the non-conformity.")
         
@@ -219,13 +245,13 @@ def show():
                         'containment_prepared_by': containment_prepared_by,
                         'containment_date': containment_date,
                     }
-                    update_scar(scar_id, update_data, user['id'])
+                    st.session_state.scar_cache = update_scar(scar_id, update_data, user['id'])
                     st.session_state.scar_form_data.update(update_data)
                     st.success("Containment section saved!")
                     st.rerun()
     
-    # Tab 4: Root Cause (editable by supplier)
-    with tabs[3]:
+    # Section 4: Root Cause (editable by supplier)
+    if section == SCAR_SECTIONS[3]:
         st.markdown("### Section 4: Root Cause Analysis")
         st.caption("Identify the root cause(s) of the non-conformity using the 5 Whys or similar methodology.")
         
@@ -268,13 +294,13 @@ def show():
                         'root_cause_approved_by': root_cause_approved_by,
                         'root_cause_date': root_cause_date,
                     }
-                    update_scar(scar_id, update_data, user['id'])
+                    st.session_state.scar_cache = update_scar(scar_id, update_data, user['id'])
                     st.session_state.scar_form_data.update(update_data)
                     st.success("Root Cause section saved!")
                     st.rerun()
     
-    # Tab 5: Correction (editable by supplier)
-    with tabs[4]:
+    # Section 5: Correction (editable by supplier)
+    if section == SCAR_SECTIONS[4]:
         st.markdown("### Section 5: Corrective Action")
         st.caption("Describe the corrective actions taken to address the root cause.")
         
@@ -308,13 +334,13 @@ def show():
                         'correction_approved_by': correction_approved_by,
                         'correction_date': correction_date,
                     }
-                    update_scar(scar_id, update_data, user['id'])
+                    st.session_state.scar_cache = update_scar(scar_id, update_data, user['id'])
                     st.session_state.scar_form_data.update(update_data)
                     st.success("Corrective Action section saved!")
                     st.rerun()
     
-    # Tab 6: Prevention (editable by supplier)
-    with tabs[5]:
+    # Section 6: Prevention (editable by supplier)
+    if section == SCAR_SECTIONS[5]:
         st.markdown("### Section 6: Preventive Action")
         st.caption("Describe actions to prevent the non-conformity from recurring.")
         
@@ -348,13 +374,13 @@ def show():
                         'prevention_approved_by': prevention_approved_by,
                         'prevention_date': prevention_date,
                     }
-                    update_scar(scar_id, update_data, user['id'])
+                    st.session_state.scar_cache = update_scar(scar_id, update_data, user['id'])
                     st.session_state.scar_form_data.update(update_data)
                     st.success("Preventive Action section saved!")
                     st.rerun()
     
-    # Tab 7: Verification (admin only)
-    with tabs[6]:
+    # Section 7: Verification (admin only)
+    if section == SCAR_SECTIONS[6]:
         st.markdown("### Section 7: Calyx Verification (Internal Quality Team)")
         
         if not is_admin:
@@ -412,7 +438,7 @@ def show():
                             'verified_by': verified_by,
                             'verification_date': verification_date,
                         }
-                        update_scar(scar_id, update_data, user['id'])
+                        st.session_state.scar_cache = update_scar(scar_id, update_data, user['id'])
                         st.session_state.scar_form_data.update(update_data)
                         st.success("Verification section saved!")
                         st.rerun()
@@ -466,7 +492,7 @@ def show():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Yes, Submit", type="primary"):
-                submit_scar(scar_id, user['id'])
+                st.session_state.scar_cache = submit_scar(scar_id, user['id'])
                 st.session_state.show_submit_confirm = False
                 st.success("Response submitted successfully!")
                 st.rerun()
@@ -481,7 +507,7 @@ def show():
         with col1:
             if st.button("Yes, Verify & Close", type="primary"):
                 update_scar(scar_id, st.session_state.scar_form_data, user['id'])
-                verify_scar(scar_id, user['id'], acceptable=True)
+                st.session_state.scar_cache = verify_scar(scar_id, user['id'], acceptable=True)
                 st.session_state.show_verify_confirm = False
                 st.success("SCAR verified and closed!")
                 st.rerun()
@@ -495,7 +521,7 @@ def show():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Yes, Return", type="primary"):
-                verify_scar(scar_id, user['id'], acceptable=False)
+                st.session_state.scar_cache = verify_scar(scar_id, user['id'], acceptable=False)
                 st.session_state.show_return_confirm = False
                 st.success("SCAR returned to supplier!")
                 st.rerun()
@@ -509,7 +535,7 @@ def show():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Yes, Reopen", type="primary"):
-                verify_scar(scar_id, user['id'], acceptable=False, reopen=True)
+                st.session_state.scar_cache = verify_scar(scar_id, user['id'], acceptable=False, reopen=True)
                 st.session_state.show_reopen_confirm = False
                 st.success("SCAR reopened!")
                 st.rerun()
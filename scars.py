@@ -3,18 +3,22 @@ SCARs List Page - View and filter all SCARs
 """
 
 import streamlit as st
-from datetime import datetime
-from database import get_all_scars, get_all_vendors
+from datetime import date
+from functools import lru_cache
+from database import get_scars, get_all_vendors
 
-def format_date(date_str):
-    """Format date string for display"""
-    if not date_str:
-        return "N/A"
+PAGE_SIZE = 50
+
+# Date cells are real dates; the table formats them client-side
+DATE_COLUMN = st.column_config.DateColumn(format="MMM DD, YYYY")
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """Parse the date part of an ISO string, or None if missing/invalid"""
     try:
-        dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        return dt.strftime("%b %d, %Y")
-    except:
-        return date_str
+        return date.fromisoformat(date_str[:10])
+    except (TypeError, ValueError):
+        return None
 
 def show():
     """Display SCARs list page"""
@@ -36,99 +40,113 @@ def show():
     # Filters
     st.markdown("---")
     
-    col1, col2, col3 = st.columns([2, 2, 2])
-    
-    with col1:
-        # Status filter using tabs
-        status_filter = st.session_state.get('scar_filter', 'all')
-        status_options = ["All", "Open", "Submitted", "Closed"]
-        selected_status = st.selectbox(
-            "Status",
-            options=status_options,
-            index=status_options.index(status_filter.capitalize()) if status_filter.capitalize() in status_options else 0
-        )
-        status_filter = None if selected_status == "All" else selected_status.lower()
-    
-    with col2:
-        if is_admin:
-            vendors = get_all_vendors()
-            vendor_options = [{"id": "", "name": "All Vendors"}] + vendors
-            selected_vendor = st.selectbox(
-                "Vendor",
-                options=[v['id'] for v in vendor_options],
-                format_func=lambda x: next((v['name'] for v in vendor_options if v['id'] == x), "All Vendors")
+    # Filters only take effect on Apply, so typing in the search box doesn't rerun the query
+    with st.form("scar_filters", clear_on_submit=False, border=False):
+        col1, col2, col3 = st.columns([2, 2, 2])
+        
+        with col1:
+            # Status filter using tabs
+            status_filter = st.session_state.get('scar_filter', 'all')
+            status_options = ["All", "Open", "Submitted", "Closed"]
+            selected_status = st.selectbox(
+                "Status",
+                options=status_options,
+                index=status_options.index(status_filter.capitalize()) if status_filter.capitalize() in status_options else 0
             )
-            if selected_vendor:
-                vendor_id = selected_vendor
-            else:
-                vendor_id = None
-    
-    with col3:
-        search = st.text_input("🔍 Search", placeholder="Search by SCAR number, product...")
+            status_filter = None if selected_status == "All" else selected_status.lower()
+        
+        with col2:
+            if is_admin:
+                vendors = get_all_vendors()
+                vendor_names = {"": "All Vendors", **{v['id']: v['name'] for v in vendors}}
+                selected_vendor = st.selectbox(
+                    "Vendor",
+                    options=list(vendor_names),
+                    format_func=lambda x: vendor_names.get(x, "All Vendors")
+                )
+                if selected_vendor:
+                    vendor_id = selected_vendor
+                else:
+                    vendor_id = None
+        
+        with col3:
+            search = st.text_input("🔍 Search", placeholder="Search by SCAR number, product...")
+        
+        st.form_submit_button("Apply Filters")
     
-    # Get SCARs
-    scars = get_all_scars(vendor_id=vendor_id, status=status_filter)
+    # Get one page of SCARs; filtering and search run in SQL
+    filters = (vendor_id, status_filter, search)
+    if st.session_state.get('scar_list_filters') != filters:
+        st.session_state.scar_list_filters = filters
+        st.session_state.scar_list_page = 0
+    page = st.session_state.get('scar_list_page', 0)
     
-    # Apply search filter
-    if search:
-        search_lower = search.lower()
-        scars = [s for s in scars if 
-                 search_lower in s.get('scar_number', '').lower() or
-                 search_lower in (s.get('product_name') or '').lower() or
-                 search_lower in (s.get('vendor_name') or '').lower() or
-                 search_lower in (s.get('defect_type') or '').lower()]
+    scars, total = get_scars(vendor_id, status_filter, search or None, PAGE_SIZE, page * PAGE_SIZE)
+    if not scars and page:
+        page = st.session_state.scar_list_page = 0
+        scars, total = get_scars(vendor_id, status_filter, search or None, PAGE_SIZE, 0)
     
     st.markdown("---")
     
     # Results count
-    st.caption(f"Showing {len(scars)} SCAR{'s' if len(scars) != 1 else ''}")
+    if total > PAGE_SIZE:
+        first = page * PAGE_SIZE + 1
+        st.caption(f"Showing {first}-{first + len(scars) - 1} of {total} SCARs")
+    else:
+        st.caption(f"Showing {total} SCAR{'s' if total != 1 else ''}")
     
     if not scars:
         st.info("No SCARs found matching your criteria.")
         return
     
-    # SCARs table
+    # SCARs table: one dataframe element instead of a row of widgets per SCAR
+    today = date.today()
+    rows = []
     for scar in scars:
-        is_overdue = False
-        if scar.get('response_due_date') and scar['status'] in ['new', 'open']:
-            try:
-                due_date = datetime.fromisoformat(scar['response_due_date'])
-                is_overdue = due_date < datetime.now()
-            except:
-                pass
-        
-        with st.container():
-            col1, col2, col3, col4, col5 = st.columns([1.5, 2.5, 1.5, 1.5, 1])
-            
-            with col1:
-                st.markdown(f"**{scar['scar_number']}**")
-                status_class = f"badge-{scar['status']}"
-                st.markdown(f'<span class="badge {status_class}">{scar["status"].upper()}</span>', unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown(f"**{scar.get('product_name') or 'No product specified'}**")
-                st.caption(f"{scar.get('defect_type') or 'No defect type'}")
-                if is_admin:
-                    st.caption(f"📍 {scar.get('vendor_name', 'Unassigned')}")
-            
-            with col3:
-                if scar.get('severity'):
-                    severity_class = f"badge-{scar['severity']}"
-                    st.markdown(f'<span class="badge {severity_class}">{scar["severity"].upper()}</span>', unsafe_allow_html=True)
-                st.caption(f"Issued: {format_date(scar.get('date_issued'))}")
-            
-            with col4:
-                due_text = format_date(scar.get('response_due_date'))
-                if is_overdue:
-                    st.markdown(f"**⚠️ OVERDUE**")
-                    st.caption(f"Due: {due_text}")
-                else:
-                    st.caption(f"Due: {due_text}")
-            
-            with col5:
-                if st.button("View", key=f"view_{scar['id']}", use_container_width=True):
-                    st.session_state.selected_scar_id = scar['id']
-                    st.session_state.page = "scar_detail"
-                    st.rerun()
-            
-            st.markdown("---")
+        due = parse_date(scar.get('response_due_date'))
+        # Anything still awaiting a response and due today or earlier is overdue
+        is_overdue = due is not None and scar['status'] in ('new', 'open') and due <= today
+        row = {
+            "SCAR #": scar['scar_number'],
+            "Status": f"{scar['status'].upper()} · ⚠️ OVERDUE" if is_overdue else scar['status'].upper(),
+            "Product": scar.get('product_name') or 'No product specified',
+            "Defect": scar.get('defect_type') or 'No defect type',
+        }
+        if is_admin:
+            row["Vendor"] = scar.get('vendor_name') or 'Unassigned'
+        row["Severity"] = (scar.get('severity') or '').upper()
+        row["Issued"] = parse_date(scar.get('date_issued'))
+        row["Due"] = due
+        rows.append(row)
+    
+    event = st.dataframe(
+        rows,
+        key="scars_table",
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Issued": DATE_COLUMN, "Due": DATE_COLUMN},
+        on_select="rerun",
+        selection_mode="single-row",
+    )
+    st.caption("Select a row to open the SCAR.")
+    
+    if event.selection.rows:
+        st.session_state.selected_scar_id = scars[event.selection.rows[0]]['id']
+        st.session_state.page = "scar_detail"
+        st.session_state.pop("scars_table", None)
+        st.rerun()
+    
+    # Pagination
+    if total > PAGE_SIZE:
+        last_page = (total - 1) // PAGE_SIZE
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("← Previous", disabled=page == 0, use_container_width=True):
+                st.session_state.scar_list_page = page - 1
+                st.rerun()
+        with col2:
+            st.caption(f"Page {page + 1} of {last_page + 1}")
+        with col3:
+            if st.button("Next →", disabled=page >= last_page, use_container_width=True):
+                st.session_state.scar_list_page = page + 1
+                st.rerun()
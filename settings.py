@@ -6,6 +6,7 @@ import streamlit as st
 from database import (
     get_all_users,
     get_all_vendors,
+    get_all_vendors_with_contacts,
     update_user,
     delete_user,
     update_user_password,
@@ -13,7 +14,6 @@ from database import (
     create_vendor,
     update_vendor,
     delete_vendor,
-    get_vendor_contacts,
     create_vendor_contact,
     update_vendor_contact,
     delete_vendor_contact,
@@ -48,6 +48,15 @@ def show():
         show_vendor_management()
 
 
+def _reset_stale_selection(table_key, rows):
+    """Drop a dataframe's row selection when the rows under it are no longer the same users"""
+    row_ids = tuple(r['id'] for r in rows)
+    ids_key = f"_{table_key}_ids"
+    if st.session_state.get(ids_key) != row_ids:
+        st.session_state.pop(table_key, None)
+        st.session_state[ids_key] = row_ids
+
+
 def show_user_management():
     """Display user management section"""
     st.markdown("### User Management")
@@ -55,6 +64,8 @@ def show_user_management():
     # Get all users and vendors
     users = get_all_users()
     vendors = get_all_vendors()
+    vendor_ids = [v['id'] for v in vendors]
+    vendor_names = {v['id']: v['name'] for v in vendors}
     
     # Filter controls
     col1, col2, col3 = st.columns([2, 2, 2])
@@ -91,30 +102,43 @@ def show_user_management():
         st.markdown("---")
         st.markdown(f"### ⏳ Pending Approvals ({len(pending_users)})")
         
-        for pending_user in pending_users:
-            with st.container():
-                col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
-                
-                with col1:
-                    st.markdown(f"**{pending_user['name']}**")
-                    st.caption(pending_user['email'])
-                
-                with col2:
-                    st.caption(f"Company: {pending_user.get('vendor_name', 'Not assigned')}")
-                
-                with col3:
-                    if st.button("✅ Approve", key=f"approve_{pending_user['id']}", use_container_width=True):
-                        update_user(pending_user['id'], status='approved')
-                        st.success(f"User {pending_user['name']} approved!")
-                        st.rerun()
-                
-                with col4:
-                    if st.button("❌ Reject", key=f"reject_{pending_user['id']}", use_container_width=True):
-                        update_user(pending_user['id'], status='rejected')
-                        st.warning(f"User {pending_user['name']} rejected.")
-                        st.rerun()
-                
-                st.markdown("---")
+        # Selections are row positions, so they must not outlive the list they index
+        _reset_stale_selection("pending_users_table", pending_users)
+        event = st.dataframe(
+            [
+                {
+                    "Name": u['name'],
+                    "Email": u['email'],
+                    "Company": u.get('vendor_name') or "Not assigned",
+                }
+                for u in pending_users
+            ],
+            key="pending_users_table",
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="multi-row",
+        )
+        
+        selected = [pending_users[i] for i in event.selection.rows if i < len(pending_users)]
+        col1, col2, col3 = st.columns([1.5, 1.5, 4])
+        with col1:
+            if st.button("✅ Approve", key="approve_pending", disabled=not selected, use_container_width=True):
+                for u in selected:
+                    update_user(u['id'], status='approved')
+                st.session_state.pop("pending_users_table", None)
+                st.success(f"Approved {len(selected)} user(s)!")
+                st.rerun()
+        with col2:
+            if st.button("❌ Reject", key="reject_pending", disabled=not selected, use_container_width=True):
+                for u in selected:
+                    update_user(u['id'], status='rejected')
+                st.session_state.pop("pending_users_table", None)
+                st.warning(f"Rejected {len(selected)} user(s).")
+                st.rerun()
+        with col3:
+            if not selected:
+                st.caption("Select users to approve or reject.")
     
     # Add new admin user
     st.markdown("---")
@@ -150,110 +174,118 @@ def show_user_management():
     if not filtered_users:
         st.info("No users found matching your criteria.")
     else:
-        for u in filtered_users:
-            with st.container():
-                col1, col2, col3, col4, col5 = st.columns([2.5, 2, 1.5, 1.5, 1.5])
-                
-                with col1:
-                    st.markdown(f"**{u['name']}**")
-                    st.caption(u['email'])
-                
-                with col2:
-                    role_badge = "🔑 Admin" if u['role'] == 'admin' else "📦 Supplier"
-                    st.markdown(role_badge)
-                    if u.get('vendor_name'):
-                        st.caption(u['vendor_name'])
-                
-                with col3:
-                    status_colors = {
-                        'pending': '🟡',
-                        'approved': '🟢',
-                        'rejected': '🔴'
-                    }
-                    st.markdown(f"{status_colors.get(u['status'], '⚪')} {u['status'].capitalize()}")
-                
-                with col4:
-                    if st.button("✏️ Edit", key=f"edit_user_{u['id']}", use_container_width=True):
-                        st.session_state.editing_user = u['id']
-                
-                with col5:
-                    # Don't allow deleting yourself
-                    if u['id'] != st.session_state.user['id']:
-                        if st.button("🗑️", key=f"delete_user_{u['id']}", use_container_width=True):
-                            st.session_state.deleting_user = u['id']
-                
-                # Edit form
-                if st.session_state.get('editing_user') == u['id']:
-                    with st.form(f"edit_user_form_{u['id']}"):
-                        st.markdown("##### Edit User")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            edit_name = st.text_input("Name", value=u['name'])
-                            edit_email = st.text_input("Email", value=u['email'])
-                        with col2:
-                            edit_role = st.selectbox(
-                                "Role",
-                                options=['admin', 'supplier'],
-                                index=0 if u['role'] == 'admin' else 1
-                            )
-                            edit_vendor = st.selectbox(
-                                "Vendor",
-                                options=[""] + [v['id'] for v in vendors],
-                                format_func=lambda x: "No vendor" if x == "" else next((v['name'] for v in vendors if v['id'] == x), x),
-                                index=0 if not u.get('vendor_id') else ([v['id'] for v in vendors].index(u['vendor_id']) + 1 if u.get('vendor_id') in [v['id'] for v in vendors] else 0)
-                            )
-                        
-                        edit_status = st.selectbox(
-                            "Status",
-                            options=['pending', 'approved', 'rejected'],
-                            index=['pending', 'approved', 'rejected'].index(u['status'])
-                        )
-                        
-                        col1, col2, col3 = st.columns([2, 1, 1])
-                        with col1:
-                            new_password = st.text_input("New Password (leave blank to keep current)", type="password")
-                        with col2:
-                            if st.form_submit_button("Save", type="primary"):
-                                update_user(u['id'], 
-                                           name=edit_name, 
-                                           email=edit_email, 
-                                           role=edit_role, 
-                                           vendor_id=edit_vendor or None,
-                                           status=edit_status)
-                                if new_password:
-                                    update_user_password(u['id'], new_password)
-                                st.session_state.editing_user = None
-                                st.success("User updated!")
-                                st.rerun()
-                        with col3:
-                            if st.form_submit_button("Cancel"):
-                                st.session_state.editing_user = None
-                                st.rerun()
-                
-                # Delete confirmation
-                if st.session_state.get('deleting_user') == u['id']:
-                    st.warning(f"⚠️ Are you sure you want to delete {u['name']}?")
+        status_icons = {
+            'pending': '🟡',
+            'approved': '🟢',
+            'rejected': '🔴'
+        }
+        rows = [
+            {
+                "Name": u['name'],
+                "Email": u['email'],
+                "Role": "🔑 Admin" if u['role'] == 'admin' else "📦 Supplier",
+                "Vendor": u.get('vendor_name') or "",
+                "Status": f"{status_icons.get(u['status'], '⚪')} {u['status'].capitalize()}",
+            }
+            for u in filtered_users
+        ]
+        # Filters or edits reorder the rows; a kept position would point at another user
+        _reset_stale_selection("users_table", filtered_users)
+        event = st.dataframe(
+            rows,
+            key="users_table",
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+        )
+        
+        selected = [i for i in event.selection.rows if i < len(filtered_users)]
+        if not selected:
+            st.caption("Select a user to edit or delete.")
+        else:
+            u = filtered_users[selected[0]]
+            col1, col2, col3 = st.columns([1.5, 1.5, 4])
+            with col1:
+                if st.button("✏️ Edit", key=f"edit_user_{u['id']}", use_container_width=True):
+                    st.session_state.editing_user = u['id']
+            with col2:
+                # Don't allow deleting yourself
+                if u['id'] != st.session_state.user['id']:
+                    if st.button("🗑️ Delete", key=f"delete_user_{u['id']}", use_container_width=True):
+                        st.session_state.deleting_user = u['id']
+            
+            # Edit form
+            if st.session_state.get('editing_user') == u['id']:
+                with st.form(f"edit_user_form_{u['id']}"):
+                    st.markdown("##### Edit User")
+                    
                     col1, col2 = st.columns(2)
                     with col1:
-                        if st.button("Yes, Delete", key=f"confirm_delete_user_{u['id']}", type="primary"):
-                            delete_user(u['id'])
-                            st.session_state.deleting_user = None
-                            st.success("User deleted!")
-                            st.rerun()
+                        edit_name = st.text_input("Name", value=u['name'])
+                        edit_email = st.text_input("Email", value=u['email'])
+                    with col2:
+                        edit_role = st.selectbox(
+                            "Role",
+                            options=['admin', 'supplier'],
+                            index=0 if u['role'] == 'admin' else 1
+                        )
+                        edit_vendor = st.selectbox(
+                            "Vendor",
+                            options=[""] + vendor_ids,
+                            format_func=lambda x: "No vendor" if x == "" else vendor_names.get(x, x),
+                            index=vendor_ids.index(u['vendor_id']) + 1 if u.get('vendor_id') in vendor_names else 0
+                        )
+                    
+                    edit_status = st.selectbox(
+                        "Status",
+                        options=['pending', 'approved', 'rejected'],
+                        index=['pending', 'approved', 'rejected'].index(u['status'])
+                    )
+                    
+                    col1, col2, col3 = st.columns([2, 1, 1])
+                    with col1:
+                        new_password = st.text_input("New Password (leave blank to keep current)", type="password")
                     with col2:
-                        if st.button("Cancel", key=f"cancel_delete_user_{u['id']}"):
-                            st.session_state.deleting_user = None
+                        if st.form_submit_button("Save", type="primary"):
+                            update_user(u['id'], 
+                                       name=edit_name, 
+                                       email=edit_email, 
+                                       role=edit_role, 
+                                       vendor_id=edit_vendor or None,
+                                       status=edit_status)
+                            if new_password:
+                                update_user_password(u['id'], new_password)
+                            st.session_state.editing_user = None
+                            st.success("User updated!")
                             st.rerun()
-                
-                st.markdown("---")
+                    with col3:
+                        if st.form_submit_button("Cancel"):
+                            st.session_state.editing_user = None
+                            st.rerun()
+            
+            # Delete confirmation
+            if st.session_state.get('deleting_user') == u['id']:
+                st.warning(f"⚠️ Are you sure you want to delete {u['name']}?")
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Yes, Delete", key=f"confirm_delete_user_{u['id']}", type="primary"):
+                        delete_user(u['id'])
+                        st.session_state.deleting_user = None
+                        st.session_state.pop("users_table", None)
+                        st.success("User deleted!")
+                        st.rerun()
+                with col2:
+                    if st.button("Cancel", key=f"cancel_delete_user_{u['id']}"):
+                        st.session_state.deleting_user = None
+                        st.rerun()
 
 
 def show_vendor_management():
     """Display vendor management section"""
     st.markdown("### Vendor Management")
     
-    vendors = get_all_vendors()
+    vendors = get_all_vendors_with_contacts()
     
     # Add new vendor
     with st.expander("➕ Add New Vendor"):
@@ -330,7 +362,7 @@ def show_vendor_management():
                 st.markdown("---")
                 st.markdown("##### Contacts")
                 
-                contacts = get_vendor_contacts(vendor['id'])
+                contacts = vendor['contacts']
                 
                 if contacts:
                     for contact in contacts: